@@ -0,0 +1,149 @@
+"""
+Local stand-in for the SparkPost API, for benchmarks.
+
+Accepts any request under ``/api/v1/``. Transmissions are answered with an
+id and one accepted recipient per ``"address"`` in the body; other calls
+with an empty result. Gzip request bodies are accepted.
+
+Usage::
+
+    python benchmarks/fakeapi.py [--port N] [--latency SECONDS]
+        [--error-rate RATIO] [--response-size BYTES]
+
+prints ``listening on <port>`` once ready. :func:`start` runs the server in
+a child process from Python instead, so that it does not compete with the
+client being measured for the GIL.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class FakeServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Benchmarks open many connections at once
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=0.0, error_rate=0.0,
+                 response_size=0, seed=None):
+        HTTPServer.__init__(self, address, FakeHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.padding = 'x' * response_size
+        self.random = random.Random(seed)
+        self.sequence = 0
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, Nagle's
+    # algorithm and delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.respond()
+
+    do_GET = do_PUT = do_DELETE = do_POST
+
+    def respond(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and server.random.random() < server.error_rate:
+            return self.send(500, {'errors': [{'message': 'fake error'}]})
+        if not self.path.startswith('/api/v1/'):
+            return self.send(404, {'errors': [{'message': 'not found'}]})
+
+        server.sequence += 1
+        results = {}
+        if self.path.startswith('/api/v1/transmissions') and \
+                self.command == 'POST':
+            results = {'id': str(server.sequence),
+                       'total_accepted_recipients': body.count(b'"address"'),
+                       'total_rejected_recipients': 0}
+        if server.padding:
+            results['padding'] = server.padding
+        self.send(200, {'results': results})
+
+    def send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAPI(object):
+    "Handle on a fake API server running in a child process"
+
+    def __init__(self, process, port):
+        self.process = process
+        self.port = port
+        self.base_uri = 'http://127.0.0.1:%d/api/v1' % port
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def start(latency=0.0, error_rate=0.0, response_size=0):
+    "Start a fake API server in a child process and return a :class:`FakeAPI`"
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__),
+         '--latency', str(latency), '--error-rate', str(error_rate),
+         '--response-size', str(response_size)],
+        stdout=subprocess.PIPE)
+    line = process.stdout.readline().decode('ascii')
+    if not line.startswith('listening on '):
+        process.kill()
+        raise RuntimeError('fake API failed to start')
+    return FakeAPI(process, int(line.split()[-1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to wait before answering')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with a 500')
+    parser.add_argument('--response-size', type=int, default=0,
+                        help='bytes of padding added to every result')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeServer(('127.0.0.1', args.port), args.latency,
+                        args.error_rate, args.response_size, args.seed)
+    print('listening on %d' % server.server_port)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
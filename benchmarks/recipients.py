@@ -0,0 +1,77 @@
+"""
+Measure recipient and from address handling in ``Transmissions`` with and
+without memoized address parsing and the plain address fast path.
+
+The baseline runs ``email.utils.parseaddr`` on every string, as
+``_extract_recipients`` and ``_parse_address`` used to.
+
+Usage::
+
+    python benchmarks/recipients.py [--recipients N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from email.utils import parseaddr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sparkpost.transmissions import Transmissions  # noqa: E402
+
+
+class UncachedTransmissions(Transmissions):
+    "Parse every address with parseaddr, as before memoization"
+
+    def _parse_address(self, address):
+        name, email = parseaddr(address)
+        parsed_address = {'email': email}
+        if name:
+            parsed_address['name'] = name
+        return parsed_address
+
+    def _extract_recipients(self, recipients):
+        return [{'address': self._parse_address(recip)}
+                for recip in recipients]
+
+
+def make_recipients(count, named):
+    if named:
+        return ['User %d <user%d@example.com>' % (i, i) for i in range(count)]
+    return ['user%d@example.com' % i for i in range(count)]
+
+
+def measure(transmissions, recipients, repeat):
+    def send_shape():
+        transmissions._translate_keys(
+            recipients=recipients, cc=['cc@example.com'],
+            from_email='Sender <sender@example.com>', text='hello')
+
+    return timeit.timeit(send_shape, number=repeat) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipients', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    current = Transmissions('uri', 'key')
+    baseline = UncachedTransmissions('uri', 'key')
+    report = []
+    for named in (False, True):
+        recipients = make_recipients(args.recipients, named)
+        assert (current._translate_keys(recipients=recipients) ==
+                baseline._translate_keys(recipients=recipients))
+        report.append({
+            'shape': '%d %s recipients' % (
+                args.recipients, 'named' if named else 'plain'),
+            'memoized_ms': measure(current, recipients, args.repeat),
+            'parseaddr_ms': measure(baseline, recipients, args.repeat),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
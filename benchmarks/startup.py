@@ -0,0 +1,91 @@
+"""
+Measure the cold-start cost of the client: ``import sparkpost``, building
+``SparkPost()`` and sending the first transmission.
+
+Every sample runs in a fresh interpreter so module import caches do not leak
+between samples. The first request goes to a local stub server, so the
+numbers reflect client-side cost plus one loopback round trip.
+
+Usage::
+
+    python benchmarks/startup.py [--samples N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import sparkpost
+t1 = time.perf_counter()
+sp = sparkpost.SparkPost('fake-key')
+t2 = time.perf_counter()
+sp.base_uri = 'http://127.0.0.1:%(port)d/api/v1'
+sp.transmissions.send(recipients=['to@example.com'], text='hi',
+                      from_email='from@example.com', subject='startup')
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'init': t2 - t1,
+                  'first_request': t3 - t2, 'total': t3 - t0}))
+"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    body = json.dumps({'results': {'id': '1', 'total_accepted_recipients': 1,
+                                   'total_rejected_recipients': 0}}).encode()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_sample(port):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output(
+        [sys.executable, '-c', SNIPPET % {'port': port}], env=env)
+    return json.loads(output.decode('utf-8'))
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--samples', type=int, default=20)
+    args = parser.parse_args()
+
+    server = HTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        samples = [run_sample(server.server_port)
+                   for _ in range(args.samples)]
+    finally:
+        server.shutdown()
+
+    report = dict(
+        (phase, {'median_ms': median([s[phase] for s in samples]) * 1000,
+                 'min_ms': min(s[phase] for s in samples) * 1000})
+        for phase in ('import', 'init', 'first_request', 'total')
+    )
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Throughput, latency and memory of the clients against a local fake API.
+
+Every (client, shape) scenario runs in a fresh interpreter against a fake
+API server started by :mod:`fakeapi` in another process, and reports sends
+per second, latency percentiles and peak memory. The report is JSON; pass a
+previous report with ``--compare`` to add the ratio of each figure to it.
+
+Clients: ``sync`` (``sparkpost.SparkPost`` from a thread pool), ``tornado``
+(concurrent coroutines) and ``django`` (the email backend, from a thread
+pool). Shapes: ``single`` (one recipient), ``many_recipients`` (1000 with
+substitution data), ``big_attachment`` (a 5 MB file) and ``template``
+(a stored template with substitution data).
+
+Usage::
+
+    python benchmarks/suite.py [--clients sync,tornado,django]
+        [--shapes single,...] [--requests N] [--concurrency N]
+        [--latency SECONDS] [--error-rate RATIO] [--response-size BYTES]
+        [--output FILE] [--compare FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakeapi  # noqa: E402
+
+CLIENTS = ('sync', 'tornado', 'django')
+SHAPES = ('single', 'many_recipients', 'big_attachment', 'template')
+ATTACHMENT_BYTES = 5 * 1024 * 1024
+
+
+def make_kwargs(shape, attachment):
+    kwargs = dict(from_email='Sender <sender@example.com>',
+                  subject='Benchmark', text='Hello {{name}}',
+                  html='<p>Hello {{name}}</p>' * 20)
+    if shape == 'many_recipients':
+        kwargs['recipients'] = [
+            {'address': {'email': 'user%d@example.com' % i},
+             'substitution_data': {'name': 'User %d' % i}}
+            for i in range(1000)]
+    else:
+        kwargs['recipients'] = ['user@example.com']
+    if shape == 'big_attachment':
+        kwargs['attachments'] = [{'name': 'report.bin',
+                                  'type': 'application/octet-stream',
+                                  'filename': attachment}]
+    if shape == 'template':
+        del kwargs['text'], kwargs['html']
+        kwargs['template'] = 'benchmark-template'
+        kwargs['substitution_data'] = {'name': 'User',
+                                       'items': list(range(100))}
+    return kwargs
+
+
+def make_message(shape, attachment):
+    from django.core.mail import EmailMessage
+    message = EmailMessage('Benchmark', 'Hello', 'sender@example.com',
+                           ['user@example.com'])
+    if shape == 'many_recipients':
+        message.to = ['user%d@example.com' % i for i in range(1000)]
+    if shape == 'big_attachment':
+        message.attach_file(attachment, 'application/octet-stream')
+    if shape == 'template':
+        message.template = 'benchmark-template'
+    return message
+
+
+def run_sync(base_uri, shape, attachment, requests, concurrency):
+    from sparkpost import SparkPost
+    from sparkpost.base import RequestsTransport
+    from sparkpost.bulk import dispatch
+
+    transport = RequestsTransport(pool_maxsize=concurrency)
+    sp = SparkPost('fake-key', transport=transport)
+    sp.transmissions.base_uri = base_uri
+    kwargs = make_kwargs(shape, attachment)
+    return run_threads(lambda: sp.transmissions.send(**kwargs), requests,
+                       concurrency, dispatch)
+
+
+def run_django(base_uri, shape, attachment, requests, concurrency):
+    import django
+    from django.conf import settings
+    settings.configure(
+        SPARKPOST_API_KEY='fake-key',
+        EMAIL_BACKEND='sparkpost.django.email_backend.SparkPostEmailBackend')
+    django.setup()
+    from django.core.mail import get_connection
+    from sparkpost.bulk import dispatch
+
+    backend = get_connection()
+    backend.client.base_uri = base_uri
+    message = make_message(shape, attachment)
+    return run_threads(lambda: backend.send_messages([message]), requests,
+                       concurrency, dispatch)
+
+
+def run_threads(send, requests, concurrency, dispatch):
+    latencies = []
+
+    def timed(_):
+        started = time.perf_counter()
+        try:
+            send()
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    errors = sum(1 for _, _, _, error in dispatch(timed, range(requests),
+                                                  concurrency)
+                 if error is not None)
+    return latencies, errors, time.perf_counter() - started
+
+
+def run_tornado(base_uri, shape, attachment, requests, concurrency):
+    from tornado import gen, ioloop
+    from tornado.httpclient import AsyncHTTPClient
+    from sparkpost.tornado import SparkPost
+
+    AsyncHTTPClient.configure(None, max_clients=concurrency)
+    sp = SparkPost('fake-key')
+    sp.transmissions.base_uri = base_uri
+    kwargs = make_kwargs(shape, attachment)
+    latencies = []
+    state = {'next': 0, 'errors': 0}
+
+    @gen.coroutine
+    def worker():
+        while state['next'] < requests:
+            state['next'] += 1
+            started = time.perf_counter()
+            try:
+                yield sp.transmissions.send(**kwargs)
+            except Exception:
+                state['errors'] += 1
+            latencies.append(time.perf_counter() - started)
+
+    @gen.coroutine
+    def main():
+        yield [worker() for _ in range(concurrency)]
+
+    started = time.perf_counter()
+    ioloop.IOLoop.current().run_sync(main)
+    return latencies, state['errors'], time.perf_counter() - started
+
+
+RUNNERS = {'sync': run_sync, 'tornado': run_tornado, 'django': run_django}
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1048576.0
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def max_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1048576.0 if sys.platform == 'darwin' else 1024.0)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return None
+    rank = int(round(fraction * len(values)))
+    return values[min(len(values) - 1, max(0, rank - 1))]
+
+
+def run_scenario(args):
+    "Runs in the child process; prints one JSON result"
+    rss_before = current_rss_mb()
+    latencies, errors, elapsed = RUNNERS[args.client](
+        args.base_uri, args.shape, args.attachment, args.requests,
+        args.concurrency)
+    peak = max_rss_mb()
+    result = {
+        'client': args.client,
+        'shape': args.shape,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'sends_per_second': args.requests / elapsed,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000,
+            'p50': percentile(latencies, 0.5) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': max(latencies) * 1000,
+        },
+        'max_rss_mb': peak,
+        'rss_growth_mb': peak - rss_before if rss_before else None,
+    }
+    print(json.dumps(result))
+
+
+def spawn_scenario(client, shape, base_uri, attachment, args):
+    command = [sys.executable, os.path.abspath(__file__), '--run-scenario',
+               '--client', client, '--shape', shape, '--base-uri', base_uri,
+               '--attachment', attachment, '--requests', str(args.requests),
+               '--concurrency', str(args.concurrency)]
+    try:
+        output = subprocess.check_output(command)
+    except subprocess.CalledProcessError as ex:
+        return {'client': client, 'shape': shape,
+                'failed': 'exit status %d' % ex.returncode}
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def compare(results, baseline):
+    previous = dict(((r['client'], r['shape']), r)
+                    for r in baseline.get('results', []))
+    for result in results:
+        before = previous.get((result['client'], result['shape']))
+        if before is None or 'failed' in result or 'failed' in before:
+            continue
+        result['vs_baseline'] = {
+            'sends_per_second': (result['sends_per_second'] /
+                                 before['sends_per_second']),
+            'p50': result['latency_ms']['p50'] / before['latency_ms']['p50'],
+            'p99': result['latency_ms']['p99'] / before['latency_ms']['p99'],
+            'max_rss_mb': result['max_rss_mb'] / before['max_rss_mb'],
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', default=','.join(CLIENTS))
+    parser.add_argument('--shapes', default=','.join(SHAPES))
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--response-size', type=int, default=0)
+    parser.add_argument('--output', help='write the report to this file')
+    parser.add_argument('--compare', help='previous report to compare with')
+    # Used by the suite to run a single scenario in a child process
+    parser.add_argument('--run-scenario', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--client', help=argparse.SUPPRESS)
+    parser.add_argument('--shape', help=argparse.SUPPRESS)
+    parser.add_argument('--base-uri', help=argparse.SUPPRESS)
+    parser.add_argument('--attachment', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        return run_scenario(args)
+
+    fd, attachment = tempfile.mkstemp(suffix='.bin')
+    with os.fdopen(fd, 'wb') as a_file:
+        a_file.write(os.urandom(ATTACHMENT_BYTES))
+    api = fakeapi.start(args.latency, args.error_rate, args.response_size)
+    try:
+        results = [spawn_scenario(client, shape, api.base_uri, attachment,
+                                  args)
+                   for client in args.clients.split(',')
+                   for shape in args.shapes.split(',')]
+    finally:
+        api.stop()
+        os.remove(attachment)
+
+    if args.compare:
+        with open(args.compare) as a_file:
+            compare(results, json.load(a_file))
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'options': dict((key, getattr(args, key)) for key in (
+                'requests', 'concurrency', 'latency', 'error_rate',
+                'response_size')),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as a_file:
+            a_file.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
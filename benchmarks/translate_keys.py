@@ -0,0 +1,96 @@
+"""
+Compare ``Transmissions._translate_keys`` against the previous implementation,
+which deep copied its keyword arguments before translating them.
+
+For each payload shape the script reports the mean time per call and the
+peak memory allocated during one call (from ``tracemalloc``).
+
+Usage::
+
+    python benchmarks/translate_keys.py [--repeat N]
+"""
+import argparse
+import base64
+import copy
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sparkpost.transmissions import Transmissions  # noqa: E402
+
+
+class DeepCopyTransmissions(Transmissions):
+    "The pre copy-on-write behaviour: deep copy everything first"
+
+    def _translate_keys(self, **kwargs):
+        return super(DeepCopyTransmissions, self)._translate_keys(
+            **copy.deepcopy(kwargs))
+
+
+def make_payload(recipients, attachment_bytes):
+    payload = dict(
+        recipients=[
+            {'address': {'email': 'user%d@example.com' % i},
+             'substitution_data': {'first_name': 'User %d' % i, 'id': i}}
+            for i in range(recipients)
+        ],
+        cc=['cc@example.com'],
+        from_email='Sender <sender@example.com>',
+        subject='Benchmark',
+        html='<p>Hello {{first_name}}</p>' * 50,
+        substitution_data={'items': list(range(100))},
+        metadata={'campaign': 'benchmark'},
+        track_opens=True,
+    )
+    if attachment_bytes:
+        data = base64.b64encode(b'x' * attachment_bytes).decode('ascii')
+        payload['attachments'] = [
+            {'type': 'application/pdf', 'name': 'doc.pdf', 'data': data}]
+    return payload
+
+
+SHAPES = [
+    ('10 recipients', 10, 0),
+    ('1k recipients', 1000, 0),
+    ('10k recipients', 10000, 0),
+    ('10 recipients, 1 MB attachment', 10, 1024 * 1024),
+    ('10 recipients, 10 MB attachment', 10, 10 * 1024 * 1024),
+]
+
+
+def measure(transmissions, payload, repeat):
+    seconds = timeit.timeit(lambda: transmissions._translate_keys(**payload),
+                            number=repeat) / repeat
+    tracemalloc.start()
+    transmissions._translate_keys(**payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'mean_ms': seconds * 1000, 'peak_kib': peak / 1024.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    current = Transmissions('uri', 'key')
+    legacy = DeepCopyTransmissions('uri', 'key')
+    report = []
+    for name, recipients, attachment_bytes in SHAPES:
+        payload = make_payload(recipients, attachment_bytes)
+        assert (current._translate_keys(**payload) ==
+                legacy._translate_keys(**payload))
+        report.append({
+            'shape': name,
+            'copy_on_write': measure(current, payload, args.repeat),
+            'deepcopy': measure(legacy, payload, args.repeat),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
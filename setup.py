@@ -14,7 +14,10 @@ setup(
     license='Apache 2.0',
     description='SparkPost Python API client',
     long_description=readme,
-    install_requires=['requests>=2.20.1'],
+    install_requires=[
+        'requests>=2.20.1',
+        'futures; python_version < "3"',
+    ],
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
@@ -1,11 +1,13 @@
 import os
 
-from .base import RequestsTransport
+from .base import LazyResource, RequestsTransport
 from .exceptions import SparkPostException
+from .hooks import Hooks
 from .metrics import Metrics
 from .recipient_lists import RecipientLists
 from .suppression_list import SuppressionList
 from .templates import Templates
+from .tracing import NOOP_TRACER
 from .transmissions import Transmissions
 
 
@@ -18,9 +20,34 @@ US_API = 'api.sparkpost.com'
 class SparkPost(object):
     TRANSPORT_CLASS = RequestsTransport
 
+    metrics = LazyResource('metrics', Metrics)
+    recipient_lists = LazyResource('recipient_lists', RecipientLists)
+    suppression_list = LazyResource('suppression_list', SuppressionList)
+    templates = LazyResource('templates', Templates)
+    transmissions = LazyResource('transmissions', Transmissions)
+
     def __init__(self, api_key=None, base_uri=US_API,
-                 version='1'):
-        "Set up the SparkPost API client"
+                 version='1', transport=None, hooks=None, tracer=None):
+        """
+        Set up the SparkPost API client. Resources are built on first access
+        and the transport does not open a connection until the first request.
+
+        :param str api_key: SparkPost API key. Defaults to the
+            ``SPARKPOST_API_KEY`` environment variable
+        :param str base_uri: API host, e.g. ``US_API`` or ``EU_API``
+        :param str version: API version
+        :param transport: Transport instance shared by every resource of this
+            client. Pass the same instance to several clients to share one
+            connection pool between them. Defaults to a new
+            ``TRANSPORT_CLASS()``
+        :param hooks: :class:`~sparkpost.hooks.Hooks` called around every
+            request, available as ``self.hooks``. Defaults to an empty
+            ``Hooks()``
+        :param tracer: :class:`~sparkpost.tracing.Tracer` recording a span
+            per request, e.g. an
+            :class:`~sparkpost.tracing.OpenTelemetryTracer`. Defaults to a
+            tracer that records nothing
+        """
         if not api_key:
             api_key = self.get_api_key()
             if not api_key:
@@ -28,20 +55,22 @@ class SparkPost(object):
 
         self.base_uri = 'https://' + base_uri + '/api/v' + version
         self.api_key = api_key
+        if transport is None:
+            transport = self.TRANSPORT_CLASS()
+        self.transport = transport
+        self.hooks = hooks if hooks is not None else Hooks()
+        self.tracer = tracer if tracer is not None else NOOP_TRACER
 
-        self.metrics = Metrics(self.base_uri, self.api_key,
-                               self.TRANSPORT_CLASS)
-        self.recipient_lists = RecipientLists(self.base_uri, self.api_key,
-                                              self.TRANSPORT_CLASS)
-        self.suppression_list = SuppressionList(self.base_uri, self.api_key,
-                                                self.TRANSPORT_CLASS)
-        self.templates = Templates(self.base_uri, self.api_key,
-                                   self.TRANSPORT_CLASS)
-        self.transmissions = Transmissions(self.base_uri, self.api_key,
-                                           self.TRANSPORT_CLASS)
+    @property
+    def transmission(self):
         # Keeping self.transmission for backwards compatibility.
         # Will be removed in a future release.
-        self.transmission = self.transmissions
+        return self.transmissions
+
+    def _build_resource(self, resource_class):
+        return resource_class(self.base_uri, self.api_key,
+                              self.TRANSPORT_CLASS, transport=self.transport,
+                              hooks=self.hooks, tracer=self.tracer)
 
     def get_api_key(self):
         "Get API key from environment variable"
@@ -0,0 +1,35 @@
+import sparkpost
+from sparkpost.base import LazyResource
+
+from .exceptions import SparkPostAPIException
+from .base import AiohttpTransport
+from .metrics import Metrics
+from .transmissions import Transmissions
+
+__all__ = ["SparkPost", "AiohttpTransport", "SparkPostAPIException",
+           "Metrics", "Transmissions"]
+
+
+class SparkPost(sparkpost.SparkPost):
+    """
+    asyncio flavour of :class:`sparkpost.SparkPost`. Every resource method
+    returns a coroutine. Use the client as an async context manager, or call
+    :meth:`close`, to release the pooled connections::
+
+        async with SparkPost('YOUR API KEY') as sp:
+            await sp.transmissions.send(...)
+    """
+
+    TRANSPORT_CLASS = AiohttpTransport
+
+    metrics = LazyResource('metrics', Metrics)
+    transmissions = LazyResource('transmissions', Transmissions)
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import aiohttp
+
+from ..codec import JSONCodec
+from .exceptions import SparkPostAPIException
+
+
+class AiohttpTransport(object):
+    """
+    Transport backed by a single ``aiohttp.ClientSession`` whose keep-alive
+    connector is shared by every resource of the client. The session is
+    created on the first request, inside the running event loop.
+
+    :param int limit: Maximum number of simultaneous connections
+    :param int limit_per_host: Maximum number of simultaneous connections to
+        one host, ``0`` for no per-host limit
+    :param float keepalive_timeout: Seconds an idle connection is kept open
+    :param codec: JSON codec used for request bodies and responses, see
+        :func:`sparkpost.codec.get_codec`. Defaults to the stdlib ``json``
+    :param retry: :class:`~sparkpost.retry.RetryPolicy` applied to failed
+        calls. By default nothing is retried
+    :param rate_limiter: :class:`~sparkpost.ratelimit.RateLimiter` every
+        request, retries included, awaits before it is sent
+    :param compression: :class:`~sparkpost.compression.GzipCompression`
+        applied to request bodies. By default bodies are sent uncompressed
+    """
+
+    supports_context = True
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=15,
+                 codec=None, retry=None, rate_limiter=None,
+                 compression=None):
+        self.codec = codec or JSONCodec()
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.compression = compression
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def request(self, method, uri, headers, **kwargs):
+        context = kwargs.pop('context', None)
+        if kwargs.get('params'):
+            kwargs['params'] = _encode_params(kwargs['params'])
+        if self.compression is not None and kwargs.get('data') is not None:
+            headers, kwargs['data'] = self.compression.compress(
+                headers, kwargs['data'])
+            if context is not None and 'Content-Encoding' in headers:
+                context.compressed(kwargs['data'])
+        if context is None:
+            return self._request(method, uri, headers, kwargs)
+        return self._instrumented_request(method, uri, headers, kwargs,
+                                          context)
+
+    async def _instrumented_request(self, method, uri, headers, kwargs,
+                                    context):
+        try:
+            result = await self._request(method, uri, headers, kwargs,
+                                         context)
+        except Exception as ex:
+            context.fail(ex)
+            raise
+        context.finish(result)
+        return result
+
+    async def _request(self, method, uri, headers, kwargs, context=None):
+        if self.retry is None:
+            response, body = await self._fetch(method, uri, headers, kwargs,
+                                               context)
+        else:
+            response, body = await self._fetch_with_retry(method, uri,
+                                                          headers, kwargs,
+                                                          context)
+        if response.status == 204:
+            return True
+        if not 200 <= response.status < 300:
+            raise SparkPostAPIException(response, body)
+        decoding = time.time()
+        try:
+            result = self.codec.loads(body)
+        except ValueError:
+            raise SparkPostAPIException(response, body)
+        if context is not None:
+            context.phase('decode', decoding, time.time())
+        if 'results' in result:
+            return result['results']
+        return result
+
+    async def _fetch(self, method, uri, headers, kwargs, context=None):
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(uri)
+            if delay:
+                await asyncio.sleep(delay)
+        if context is None:
+            async with self.session.request(method, uri, headers=headers,
+                                            **kwargs) as response:
+                body = await response.read()
+            return response, body
+        context.attempts += 1
+        sent = time.time()
+        try:
+            async with self.session.request(method, uri, headers=headers,
+                                            **kwargs) as response:
+                context.ttfb = time.time() - sent
+                body = await response.read()
+        finally:
+            context.phase('network', sent, time.time())
+        context.status = response.status
+        context.response_bytes = len(body)
+        return response, body
+
+    async def _fetch_with_retry(self, method, uri, headers, kwargs,
+                                context=None):
+        self.retry.on_request()
+        attempt = 1
+        while True:
+            try:
+                response, body = await self._fetch(method, uri, headers,
+                                                   kwargs, context)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = self.retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                if 200 <= response.status < 300:
+                    return response, body
+                delay = self.retry.next_delay(
+                    method, attempt, response.status,
+                    response.headers.get('Retry-After'))
+                if delay is None:
+                    return response, body
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def _encode_params(params):
+    # Match requests: lists become repeated keys, booleans lowercase strings
+    encoded = []
+    for key, value in params.items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if isinstance(item, bool):
+                item = str(item).lower()
+            encoded.append((key, item))
+    return encoded
@@ -0,0 +1,30 @@
+import json
+
+from ..exceptions import SparkPostAPIException as RequestsSparkPostAPIException
+
+
+class SparkPostAPIException(RequestsSparkPostAPIException):
+    def __init__(self, response, body, *args, **kwargs):
+        errors = None
+        try:
+            data = json.loads(body.decode("utf-8"))
+            if data:
+                errors = [e['message'] + ': ' + e.get('description', '')
+                          for e in data['errors']]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+        if not errors:
+            errors = [body.decode("utf-8") or ""]
+        self.status = response.status
+        self.response = response
+        self.errors = errors
+        message = """Call to {uri} returned {status_code}, errors:
+
+        {errors}
+        """.format(
+            uri=response.url,
+            status_code=response.status,
+            errors='\n'.join(errors)
+        )
+        super(RequestsSparkPostAPIException, self).__init__(message, *args,
+                                                            **kwargs)
@@ -0,0 +1,20 @@
+from ..metrics import Metrics as SyncMetrics
+from ..metrics import Campaigns as SyncCampaigns
+from ..metrics import Domains as SyncDomains
+
+
+class Campaigns(SyncCampaigns):
+    async def list(self, **kwargs):
+        results = await self.request('GET', self.uri, **kwargs)
+        return results['campaigns']
+
+
+class Domains(SyncDomains):
+    async def list(self, **kwargs):
+        results = await self.request('GET', self.uri, **kwargs)
+        return results['domains']
+
+
+class Metrics(SyncMetrics):
+    campaigns_class = Campaigns
+    domains_class = Domains
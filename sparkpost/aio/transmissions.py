@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from ..bulk import BulkResults, SendResult, record_result
+from ..idempotency import IN_FLIGHT, POLL_INTERVAL
+from ..transmissions import Transmissions as SyncTransmissions, _merge_chunks
+
+
+class Transmissions(SyncTransmissions):
+    attachment_stream_threshold = None
+
+    async def get(self, transmission_id):
+        results = await self._fetch_get(transmission_id)
+        return results['transmission']
+
+    async def _send_once(self, store, key, data):
+        while True:
+            results = store.try_begin(key)
+            if results is not IN_FLIGHT:
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+        if results is not None:
+            return results
+        try:
+            results = await self.request('POST', self.uri, data=data)
+        except Exception:
+            store.finish(key, sent=False)
+            raise
+        store.finish(key, results)
+        return results
+
+    async def send_chunked(self, chunk_size=10000, concurrency=4, **kwargs):
+        """
+        Send a transmission whose recipient list is split into several API
+        requests of at most ``chunk_size`` recipients, at most
+        ``concurrency`` at a time. See the synchronous
+        :meth:`~sparkpost.transmissions.Transmissions.send_chunked`.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        chunks, send = self._chunks(chunk_size, kwargs)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send_chunk(index, chunk):
+            async with semaphore:
+                try:
+                    result = await send(index, chunk)
+                except Exception as ex:
+                    return index, None, ex
+                return index, result, None
+
+        return _merge_chunks(await asyncio.gather(
+            *[send_chunk(index, chunk) for index, chunk in enumerate(chunks)]))
+
+    async def send_many(self, transmissions, concurrency=8):
+        """
+        Send many transmissions concurrently, at most ``concurrency`` at a
+        time.
+
+        :param transmissions: Iterable of ``dict``, each holding the keyword
+            arguments for one :meth:`send` call. It is consumed lazily
+        :param int concurrency: Maximum number of requests in flight
+
+        :returns: a :class:`~sparkpost.bulk.BulkResults` list of
+            ``SendResult(index, kwargs, result, error)``, one per
+            transmission, in input order. Failures are reported in ``error``
+            rather than raised. Its ``stats`` hold counts, elapsed time and
+            throughput
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        items = enumerate(transmissions)
+        results = BulkResults()
+        outcomes = {}
+        start = time.time()
+
+        async def worker():
+            # Workers share the iterator, so it is consumed lazily
+            for index, kwargs in items:
+                result = error = None
+                try:
+                    result = await self.send(**kwargs)
+                except Exception as ex:
+                    error = ex
+                record_result(results.stats, result, error,
+                              time.time() - start)
+                outcomes[index] = SendResult(index, kwargs, result, error)
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        results.extend(outcomes[index] for index in sorted(outcomes))
+        return results
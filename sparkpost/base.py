@@ -1,31 +1,198 @@
+import threading
+import time
+
 import sparkpost
 
+from .codec import JSONCodec
 from .exceptions import SparkPostAPIException
+from .hooks import Hooks
+from .tracing import NOOP_TRACER
 
 
 class RequestsTransport(object):
-    def __init__(self):
+    """
+    Transport backed by a single ``requests.Session``. One instance is meant
+    to be shared by every resource of a client (and optionally by several
+    clients) so they all draw connections from the same pool.
+
+    :param int pool_connections: Number of per-host connection pools to cache
+    :param int pool_maxsize: Maximum number of connections kept per host
+    :param bool pool_block: Whether to block, instead of opening a throwaway
+        connection, when all ``pool_maxsize`` connections are in use
+    :param codec: JSON codec used for request bodies and responses, see
+        :func:`sparkpost.codec.get_codec`. Defaults to the stdlib ``json``
+    :param retry: :class:`~sparkpost.retry.RetryPolicy` applied to failed
+        calls. By default nothing is retried
+    :param rate_limiter: :class:`~sparkpost.ratelimit.RateLimiter` every
+        request, retries included, waits on before it is sent
+    :param compression: :class:`~sparkpost.compression.GzipCompression`
+        applied to request bodies. By default bodies are sent uncompressed
+    """
+
+    # Accepts the ``context`` of hooks and tracing, see Resource.request
+    supports_context = True
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 codec=None, retry=None, rate_limiter=None,
+                 compression=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.codec = codec or JSONCodec()
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.compression = compression
+        self._sess = None
+        self._lock = threading.Lock()
+
+    @property
+    def sess(self):
+        # The session (and the requests import) is deferred until the first
+        # request so that building a client stays cheap.
+        if self._sess is None:
+            with self._lock:
+                if self._sess is None:
+                    self._sess = self._create_session()
+        return self._sess
+
+    def _create_session(self):
         import requests
-        self.sess = requests.Session()
+        sess = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        sess.mount('https://', adapter)
+        sess.mount('http://', adapter)
+        self._network_errors = (requests.ConnectionError, requests.Timeout)
+        return sess
 
     def request(self, method, uri, headers, **kwargs):
-        response = self.sess.request(method, uri, headers=headers, **kwargs)
+        context = kwargs.pop('context', None)
+        if self.compression is not None and kwargs.get('data') is not None:
+            headers, kwargs['data'] = self.compression.compress(
+                headers, kwargs['data'])
+            if context is not None and 'Content-Encoding' in headers:
+                context.compressed(kwargs['data'])
+        if context is None:
+            return self._request(method, uri, headers, kwargs)
+        try:
+            result = self._request(method, uri, headers, kwargs, context)
+        except Exception as ex:
+            context.fail(ex)
+            raise
+        context.finish(result)
+        return result
+
+    def _request(self, method, uri, headers, kwargs, context=None):
+        if self.retry is None:
+            response = self._send(method, uri, headers, kwargs, context)
+        else:
+            response = self._request_with_retry(method, uri, headers, kwargs,
+                                                context)
+        return self._handle_response(response, context)
+
+    def _send(self, method, uri, headers, kwargs, context=None):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(uri)
+        data = kwargs.get('data')
+        if hasattr(data, 'seek'):
+            # Streamed bodies are read while sending; rewind them on retry
+            data.seek(0)
+        if context is None:
+            return self.sess.request(method, uri, headers=headers, **kwargs)
+        context.attempts += 1
+        sent = time.time()
+        try:
+            response = self.sess.request(method, uri, headers=headers,
+                                         **kwargs)
+        finally:
+            context.phase('network', sent, time.time())
+        context.status = response.status_code
+        context.ttfb = response.elapsed.total_seconds()
+        context.response_bytes = len(response.content)
+        return response
+
+    def _request_with_retry(self, method, uri, headers, kwargs,
+                            context=None):
+        self.retry.on_request()
+        attempt = 1
+        while True:
+            try:
+                response = self._send(method, uri, headers, kwargs, context)
+            except self._network_errors:
+                delay = self.retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                if response.ok:
+                    return response
+                delay = self.retry.next_delay(
+                    method, attempt, response.status_code,
+                    response.headers.get('Retry-After'))
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    def _handle_response(self, response, context=None):
         if response.status_code == 204:
             return True
         if not response.ok:
             raise SparkPostAPIException(response)
-        if 'results' in response.json():
-            return response.json()['results']
-        return response.json()
+        if context is None:
+            result = self.codec.loads(response.content)
+        else:
+            started = time.time()
+            result = self.codec.loads(response.content)
+            context.phase('decode', started, time.time())
+        if 'results' in result:
+            return result['results']
+        return result
+
+    def close(self):
+        if self._sess is not None:
+            self._sess.close()
+            self._sess = None
+
+
+class LazyResource(object):
+    """
+    Client attribute that builds its resource on first access and then caches
+    it on the client instance.
+    """
+
+    def __init__(self, name, resource_class):
+        self.name = name
+        self.resource_class = resource_class
+
+    def __get__(self, client, owner):
+        if client is None:
+            return self
+        resource = client._build_resource(self.resource_class)
+        client.__dict__[self.name] = resource
+        return resource
 
 
 class Resource(object):
     key = ""
+    default_codec = JSONCodec()
 
-    def __init__(self, base_uri, api_key, transport_class=RequestsTransport):
+    def __init__(self, base_uri, api_key, transport_class=RequestsTransport,
+                 transport=None, hooks=None, tracer=None):
         self.base_uri = base_uri
         self.api_key = api_key
-        self.transport = transport_class()
+        if transport is None:
+            transport = transport_class()
+        self.transport = transport
+        self.hooks = hooks if hooks is not None else Hooks()
+        self.tracer = tracer if tracer is not None else NOOP_TRACER
+
+    @property
+    def codec(self):
+        "JSON codec of the transport, used to serialize request bodies"
+        return getattr(self.transport, 'codec', self.default_codec)
 
     @property
     def uri(self):
@@ -37,10 +204,27 @@ class Resource(object):
             'Content-Type': 'application/json',
             'Authorization': self.api_key
         }
+        hooks = self.hooks
+        # Transports written before hooks would pass ``context`` on to
+        # their HTTP library, so it is only given to those declaring support
+        if (hooks.active or self.tracer.enabled) and \
+                getattr(self.transport, 'supports_context', False):
+            kwargs['context'] = hooks.start(method, self.key, uri,
+                                            self._uri_template(uri),
+                                            kwargs.get('data'), self.tracer)
         response = self.transport.request(method, uri, headers=headers,
                                           **kwargs)
         return response
 
+    def _uri_template(self, uri):
+        # Ids (transmission, template, list ids, email addresses...) are
+        # always the path segment that follows the resource URI
+        prefix = self.uri + '/'
+        if not uri.startswith(prefix):
+            return self.key
+        rest = uri[len(prefix):].partition('/')[2]
+        return self.key + '/{id}' + ('/' + rest if rest else '')
+
     def get(self):
         raise NotImplementedError
 
@@ -0,0 +1,105 @@
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+SendResult = namedtuple('SendResult', ['index', 'kwargs', 'result', 'error'])
+
+
+def dispatch(func, items, concurrency):
+    """
+    Call ``func(item)`` for every item on a pool of ``concurrency`` threads
+    and yield ``(index, item, result, error)`` tuples in input order.
+
+    ``items`` is consumed lazily: at most ``concurrency`` calls are in flight
+    at any time, so arbitrarily long iterables can be streamed through.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+
+    def call(item):
+        try:
+            return func(item), None
+        except Exception as ex:
+            return None, ex
+
+    items = iter(items)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index, item in enumerate(items):
+            pending.append((index, item, executor.submit(call, item)))
+            if len(pending) >= concurrency:
+                index, item, future = pending.popleft()
+                yield (index, item) + future.result()
+        while pending:
+            index, item, future = pending.popleft()
+            yield (index, item) + future.result()
+
+
+class BulkSend(object):
+    """
+    Iterable over the outcome of :meth:`Transmissions.send_many`.
+
+    Iterating sends the transmissions and yields a :class:`SendResult` per
+    input, in input order. Failed sends carry the raised exception in
+    ``error`` instead of aborting the run. :attr:`stats` is updated as
+    results are consumed.
+    """
+
+    def __init__(self, send, items, concurrency):
+        self._send = send
+        self._items = items
+        self.concurrency = concurrency
+        self.stats = new_stats()
+
+    def __iter__(self):
+        start = time.time()
+        results = dispatch(lambda kwargs: self._send(**kwargs), self._items,
+                           self.concurrency)
+        for index, kwargs, result, error in results:
+            record_result(self.stats, result, error, time.time() - start)
+            yield SendResult(index, kwargs, result, error)
+
+    def results(self):
+        "Send everything and return the list of :class:`SendResult`"
+        return list(self)
+
+
+class BulkResults(list):
+    """
+    List of :class:`SendResult` in input order, as returned by
+    ``send_many`` of the asyncio and Tornado clients, with the same
+    :attr:`stats` as :class:`BulkSend`.
+    """
+
+    def __init__(self, results=(), stats=None):
+        super(BulkResults, self).__init__(results)
+        self.stats = new_stats() if stats is None else stats
+
+
+def new_stats():
+    "Empty :attr:`BulkSend.stats`"
+    return {
+        'sent': 0,
+        'failed': 0,
+        'total_accepted_recipients': 0,
+        'total_rejected_recipients': 0,
+        'elapsed': 0.0,
+        'sends_per_second': 0.0,
+    }
+
+
+def record_result(stats, result, error, elapsed):
+    "Count a send in ``stats``, ``elapsed`` seconds after the run started"
+    if error is not None:
+        stats['failed'] += 1
+    else:
+        stats['sent'] += 1
+        if isinstance(result, dict):
+            for key in ('total_accepted_recipients',
+                        'total_rejected_recipients'):
+                stats[key] += result.get(key, 0)
+    stats['elapsed'] = elapsed
+    if elapsed > 0:
+        stats['sends_per_second'] = (
+            (stats['sent'] + stats['failed']) / elapsed)
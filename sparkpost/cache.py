@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from .streaming import READ_SIZE
+
+
+class AttachmentCache(object):
+    """
+    Size-bounded LRU cache of base64 encoded attachments, so a file sent
+    over and over is read and encoded once per process. Opt in by assigning
+    an instance to :attr:`Transmissions.attachment_cache`, either on one
+    resource or on the class to share it across clients.
+
+    :param int max_bytes: Upper bound on the total size of the cached
+        encodings. Files whose encoding is larger are never cached
+    :param str key: ``'stat'`` to key entries by path, modification time and
+        size (cheap, but misses renamed copies), or ``'hash'`` to key them by
+        a SHA-256 of the content (reads the file on every lookup, but never
+        encodes the same bytes twice)
+
+    ``hits``, ``misses`` and ``evictions`` count cache activity; :attr:`stats`
+    returns them along with the current size.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, key='stat'):
+        if key not in ('stat', 'hash'):
+            raise ValueError("key must be 'stat' or 'hash'")
+        self.max_bytes = max_bytes
+        self.key = key
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.size,
+            }
+
+    def get(self, filename, encode):
+        """
+        Return the encoding of ``filename``, calling ``encode(filename)`` on
+        a miss.
+
+        :returns: the encoded ``str``, or ``None`` if the file is too large
+            to be cached
+        """
+        stat = os.stat(filename)
+        if 4 * ((stat.st_size + 2) // 3) > self.max_bytes:
+            return None
+        key = self._key(filename, stat)
+        with self._lock:
+            encoded = self._entries.pop(key, None)
+            if encoded is not None:
+                self._entries[key] = encoded
+                self.hits += 1
+                return encoded
+            self.misses += 1
+        encoded = encode(filename)
+        self._store(key, encoded)
+        return encoded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _key(self, filename, stat):
+        if self.key == 'stat':
+            return (os.path.abspath(filename), stat.st_mtime, stat.st_size)
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as a_file:
+            for chunk in iter(lambda: a_file.read(READ_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _store(self, key, encoded):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = encoded
+            self.size += len(encoded)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
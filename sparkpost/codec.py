@@ -0,0 +1,82 @@
+import json
+
+from .exceptions import SparkPostException
+
+
+class JSONCodec(object):
+    "Serializes request bodies and decodes responses with the stdlib ``json``"
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def loads(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+
+class OrjsonCodec(object):
+    "JSON codec backed by `orjson <https://github.com/ijl/orjson>`_"
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(object):
+    "JSON codec backed by `ujson <https://github.com/ultrajson/ultrajson>`_"
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        return self._ujson.dumps(obj, escape_forward_slashes=False)
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+codecs = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+}
+
+
+def get_codec(name='json'):
+    """
+    Build a JSON codec by name.
+
+    :param str name: ``json``, ``orjson``, ``ujson``, or ``auto`` to pick the
+        fastest codec that is installed, falling back to ``json``
+
+    :returns: a codec with ``dumps(obj) -> str`` and ``loads(data)`` methods
+    :raises: :exc:`SparkPostException` if the codec is unknown or its package
+        is not installed
+    """
+    if name == 'auto':
+        for candidate in ('orjson', 'ujson'):
+            try:
+                return codecs[candidate]()
+            except ImportError:
+                pass
+        return JSONCodec()
+    if name not in codecs:
+        raise SparkPostException('Unknown JSON codec: %s' % name)
+    try:
+        return codecs[name]()
+    except ImportError:
+        raise SparkPostException('JSON codec %s is not installed' % name)
@@ -0,0 +1,261 @@
+import threading
+from bisect import bisect_left
+
+from .hooks import ON_ERROR, POST_RESPONSE, PRE_REQUEST
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0)
+
+COUNTERS = ('started', 'finished', 'retries', 'bytes_sent',
+            'bytes_received', 'bytes_saved', 'recipients')
+
+
+class _Shard(object):
+    "Statistics written by a single thread"
+
+    def __init__(self):
+        self.durations = {}
+        for name in COUNTERS:
+            setattr(self, name, {})
+
+    def merge(self, other):
+        for key, values in other.durations.copy().items():
+            mine = self.durations.get(key)
+            if mine is None:
+                self.durations[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    mine[index] += value
+        for name in COUNTERS:
+            counter = getattr(self, name)
+            for key, value in getattr(other, name).copy().items():
+                counter[key] = counter.get(key, 0) + value
+
+
+class MetricsCollector(object):
+    """
+    Client-side statistics of API calls, gathered through the hooks of one
+    or more clients: ``collector.install(sp.hooks)``.
+
+    Tracks, by resource and method:
+
+    * a latency histogram, also split by HTTP status (``'error'`` for calls
+      that got no response)
+    * the number of calls in flight
+    * the number of retries
+    * the bytes sent and received, and saved by compression
+
+    along with the recipients accepted and rejected by transmissions.
+
+    Read the statistics with :meth:`snapshot`, or :meth:`expose` them in the
+    OpenMetrics text format, e.g. from a ``/metrics`` endpoint.
+
+    :param buckets: Upper bounds of the latency histogram buckets, in seconds
+    :param str prefix: Prefix of the exposed metric names
+
+    Each thread records into its own shard, so recording takes no lock;
+    shards are summed when read.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='sparkpost'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._retired = _Shard()
+
+    def install(self, hooks):
+        "Start collecting the calls of the client owning ``hooks``"
+        hooks.register(PRE_REQUEST, self.on_request)
+        hooks.register(POST_RESPONSE, self.on_response)
+        hooks.register(ON_ERROR, self.on_response)
+        return self
+
+    def uninstall(self, hooks):
+        hooks.unregister(PRE_REQUEST, self.on_request)
+        hooks.unregister(POST_RESPONSE, self.on_response)
+        hooks.unregister(ON_ERROR, self.on_response)
+
+    def on_request(self, context):
+        started = self._shard().started
+        key = (context.resource, context.method)
+        started[key] = started.get(key, 0) + 1
+
+    def on_response(self, context):
+        shard = self._shard()
+        resource, method = context.resource, context.method
+        key = (resource, method)
+        shard.finished[key] = shard.finished.get(key, 0) + 1
+
+        status = context.status if context.status is not None else 'error'
+        duration_key = (resource, method, str(status))
+        values = shard.durations.get(duration_key)
+        if values is None:
+            # count, sum, then one slot per bucket and one for +Inf
+            values = shard.durations[duration_key] = \
+                [0, 0.0] + [0] * (len(self.buckets) + 1)
+        elapsed = context.elapsed or 0.0
+        values[0] += 1
+        values[1] += elapsed
+        values[2 + bisect_left(self.buckets, elapsed)] += 1
+
+        if context.attempts > 1:
+            shard.retries[key] = \
+                shard.retries.get(key, 0) + context.attempts - 1
+        for name, size in (('bytes_sent', context.request_bytes),
+                           ('bytes_received', context.response_bytes),
+                           ('bytes_saved', context.bytes_saved)):
+            if size:
+                counter = getattr(shard, name)
+                counter[resource] = counter.get(resource, 0) + size
+
+        result = context.result
+        if resource == 'transmissions' and isinstance(result, dict):
+            recipients = shard.recipients
+            for outcome in ('accepted', 'rejected'):
+                count = result.get('total_%s_recipients' % outcome)
+                if count:
+                    recipients[outcome] = recipients.get(outcome, 0) + count
+
+    def snapshot(self):
+        """
+        :returns: a ``dict`` of the statistics so far:
+
+            * ``requests``: ``{(resource, method, status): {'count': ...,
+              'sum': ..., 'buckets': [(upper_bound, cumulative_count), ...]}}``
+            * ``in_flight`` and ``retries``: ``{(resource, method): count}``
+            * ``bytes_sent``, ``bytes_received`` and ``bytes_saved``:
+              ``{resource: bytes}``
+            * ``recipients``: ``{'accepted': count, 'rejected': count}``
+        """
+        total = self._merged()
+        requests = {}
+        bounds = self.buckets + (float('inf'),)
+        for key, values in total.durations.items():
+            cumulative, buckets = 0, []
+            for bound, count in zip(bounds, values[2:]):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            requests[key] = {'count': values[0], 'sum': values[1],
+                             'buckets': buckets}
+        in_flight = {}
+        for key, started in total.started.items():
+            in_flight[key] = started - total.finished.get(key, 0)
+        return {
+            'requests': requests,
+            'in_flight': in_flight,
+            'retries': dict(total.retries),
+            'bytes_sent': dict(total.bytes_sent),
+            'bytes_received': dict(total.bytes_received),
+            'bytes_saved': dict(total.bytes_saved),
+            'recipients': dict(
+                dict.fromkeys(('accepted', 'rejected'), 0),
+                **total.recipients),
+        }
+
+    def expose(self):
+        "Return the statistics in the OpenMetrics text format"
+        stats = self.snapshot()
+        prefix = self.prefix
+        lines = []
+
+        name = prefix + '_request_duration_seconds'
+        lines += ['# TYPE %s histogram' % name, '# UNIT %s seconds' % name,
+                  '# HELP %s Duration of API calls.' % name]
+        for (resource, method, status), histogram in sorted(
+                stats['requests'].items()):
+            labels = _labels(resource=resource, method=method, status=status)
+            for bound, count in histogram['buckets']:
+                lines.append('%s_bucket{%s,le="%s"} %d' % (
+                    name, labels, _number(bound), count))
+            lines.append('%s_count{%s} %d' % (name, labels,
+                                              histogram['count']))
+            lines.append('%s_sum{%s} %s' % (name, labels,
+                                            _number(histogram['sum'])))
+
+        name = prefix + '_requests_in_flight'
+        lines += ['# TYPE %s gauge' % name,
+                  '# HELP %s API calls in progress.' % name]
+        for (resource, method), count in sorted(stats['in_flight'].items()):
+            lines.append('%s{%s} %d' % (
+                name, _labels(resource=resource, method=method), count))
+
+        name = prefix + '_retries'
+        lines += ['# TYPE %s counter' % name,
+                  '# HELP %s Retried attempts of API calls.' % name]
+        for (resource, method), count in sorted(stats['retries'].items()):
+            lines.append('%s_total{%s} %d' % (
+                name, _labels(resource=resource, method=method), count))
+
+        # The name of a family with a unit must end with the unit
+        for key, family, help_text in (
+                ('bytes_sent', 'sent_bytes', 'Request body bytes sent.'),
+                ('bytes_received', 'received_bytes',
+                 'Response body bytes received.'),
+                ('bytes_saved', 'saved_bytes',
+                 'Request body bytes saved by compression.')):
+            name = '%s_%s' % (prefix, family)
+            lines += ['# TYPE %s counter' % name, '# UNIT %s bytes' % name,
+                      '# HELP %s %s' % (name, help_text)]
+            for resource, count in sorted(stats[key].items()):
+                lines.append('%s_total{%s} %d' % (
+                    name, _labels(resource=resource), count))
+
+        name = prefix + '_recipients'
+        lines += ['# TYPE %s counter' % name,
+                  '# HELP %s Transmission recipients by outcome.' % name]
+        for outcome, count in sorted(stats['recipients'].items()):
+            lines.append('%s_total{%s} %d' % (
+                name, _labels(outcome=outcome), count))
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            del self._shards[:]
+            self._retired = _Shard()
+            self._local = threading.local()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merged(self):
+        total = _Shard()
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # Fold the shards of finished threads so that they do
+                    # not pile up with short-lived threads
+                    self._retired.merge(shard)
+            self._shards = live
+            total.merge(self._retired)
+            for _, shard in live:
+                total.merge(shard)
+        return total
+
+
+def _labels(**labels):
+    return ','.join('%s="%s"' % (key, _escape(value))
+                    for key, value in sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
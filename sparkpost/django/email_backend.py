@@ -1,7 +1,15 @@
+import atexit
+import json
+import os
+import threading
+
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
 
 from sparkpost import SparkPost, US_API
+from sparkpost.base import RequestsTransport
+from sparkpost.bulk import dispatch
+from sparkpost.outbox import MemoryOutbox, Outbox
 
 from .message import SparkPostMessage
 
@@ -9,6 +17,17 @@ from .message import SparkPostMessage
 class SparkPostEmailBackend(BaseEmailBackend):
     """
     SparkPost wrapper for Django email backend
+
+    Messages that only differ in their ``to`` recipients are grouped into a
+    single transmission of at most ``SPARKPOST_BATCH_SIZE`` recipients
+    (1000 by default; set it to 1 to send every message on its own). The
+    transmissions of a call to :meth:`send_messages` are sent
+    ``SPARKPOST_MAX_CONCURRENCY`` at a time (8 by default) over the
+    connection pool of the client.
+
+    Backends share one client, and so one pool of warm connections, per
+    API key and base URI; see :func:`get_client`. Settings are read once,
+    when the backend is created.
     """
 
     def __init__(self, fail_silently=False, **kwargs):
@@ -17,24 +36,256 @@ class SparkPostEmailBackend(BaseEmailBackend):
 
         sp_api_key = getattr(settings, 'SPARKPOST_API_KEY', None)
         sp_base_uri = getattr(settings, 'SPARKPOST_BASE_URI', US_API)
+        self.max_concurrency = getattr(settings, 'SPARKPOST_MAX_CONCURRENCY',
+                                       8)
+        if self.max_concurrency < 1:
+            raise ValueError('SPARKPOST_MAX_CONCURRENCY must be at least 1')
+        self.batch_size = getattr(settings, 'SPARKPOST_BATCH_SIZE', 1000)
+        self.options = getattr(settings, 'SPARKPOST_OPTIONS', {})
+
+        self.client = get_client(sp_api_key, sp_base_uri,
+                                 self.max_concurrency)
+        #: ``(message, exception)`` for every message the last call to
+        #: :meth:`send_messages` failed to send
+        self.errors = []
 
-        self.client = SparkPost(sp_api_key, sp_base_uri)
+    def open(self):
+        """
+        Connections are pooled by the shared client and opened as needed, so
+        there is nothing to open; returns ``False`` as no connection was
+        opened for this backend
+        """
+        return False
+
+    def close(self):
+        """
+        Leave the connections of the shared client open, for the next
+        backend to reuse. :func:`close_clients` closes them
+        """
 
     def send_messages(self, email_messages):
         """
         Send emails, returns integer representing number of successful emails
+
+        A failed message does not stop the others from being sent. Unless
+        ``fail_silently`` is set, the first error is raised once every
+        message has been tried; all of them are in :attr:`errors`.
         """
+        self.errors = errors = []
+        results = self._dispatch(self._batch(email_messages))
         success = 0
+        for _, (_, messages), response, error in results:
+            if error is not None:
+                errors.extend((message, error) for message in messages)
+                continue
+            success += response['total_accepted_recipients']
+        if errors and not self.fail_silently:
+            raise errors[0][1]
+        return success
+
+    def _dispatch(self, batches):
+        """
+        Send ``(transmission, messages)`` pairs, yielding ``(index, batch,
+        response, error)`` tuples
+        """
+        if len(batches) > 1:
+            return dispatch(lambda batch: self._send(batch[0]), batches,
+                            min(self.max_concurrency, len(batches)))
+        # Spare the thread pool for the usual single message
+        return [(None, batch) + self._call(batch[0]) for batch in batches]
+
+    def _call(self, message):
+        try:
+            return self._send(message), None
+        except Exception as ex:
+            return None, ex
+
+    def _batch(self, email_messages):
+        """
+        Convert messages, grouping the ones that can share a transmission.
+        Returns ``(transmission, messages)`` pairs; messages that fail to
+        convert are added to :attr:`errors`
+        """
+        batch_size = self.batch_size
+        batches = []
+        # key -> (transmission, messages, addresses in it)
+        groups = {}
         for message in email_messages:
             try:
-                response = self._send(SparkPostMessage(message))
-                success += response['total_accepted_recipients']
-            except Exception:
-                if not self.fail_silently:
-                    raise
-        return success
+                formatted = SparkPostMessage(message)
+            except Exception as ex:
+                self.errors.append((message, ex))
+                continue
+            key = _batch_key(formatted)
+            if key is None:
+                batches.append((formatted, [message]))
+                continue
+            recipients = formatted['recipients']
+            group = groups.get(key)
+            if group is not None:
+                batch, messages, addresses = group
+                # A recipient given twice must get two emails, which one
+                # transmission would not do
+                if len(batch['recipients']) + len(recipients) <= batch_size \
+                        and addresses.isdisjoint(recipients):
+                    batch['recipients'].extend(recipients)
+                    messages.append(message)
+                    addresses.update(recipients)
+                    continue
+            batch = dict(formatted, recipients=list(recipients))
+            messages = [message]
+            groups[key] = (batch, messages, set(recipients))
+            batches.append((batch, messages))
+        return batches
 
     def _send(self, message):
-        params = getattr(settings, 'SPARKPOST_OPTIONS', {}).copy()
+        params = self.options.copy()
         params.update(message)
         return self.client.transmissions.send(**params)
+
+
+class SparkPostQueuedEmailBackend(SparkPostEmailBackend):
+    """
+    SparkPost email backend that queues messages for background threads to
+    deliver, so that sending does not wait for the API.
+
+    Messages are grouped as by :class:`SparkPostEmailBackend`, then queued
+    in the process-wide outbox returned by :func:`get_outbox`. The number
+    returned by :meth:`send_messages` is the number of recipients queued;
+    delivery failures are only seen in ``backend.outbox.stats``, and in
+    ``backend.outbox.errors`` for an in-memory outbox.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super(SparkPostQueuedEmailBackend, self)\
+            .__init__(fail_silently=fail_silently, **kwargs)
+        self.outbox = get_outbox()
+
+    def _dispatch(self, batches):
+        # Queueing is quick; threads would only add overhead
+        return [(None, batch) + self._call(batch[0]) for batch in batches]
+
+    def _send(self, message):
+        params = self.options.copy()
+        params.update(message)
+        self.outbox.send(**params)
+        recipients = sum(len(params.get(key) or ())
+                         for key in ('recipients', 'cc', 'bcc'))
+        return {'total_accepted_recipients': recipients}
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """
+    Outbox of :class:`SparkPostQueuedEmailBackend`, created and started on
+    first use and shared by the whole process.
+
+    It is an :class:`~sparkpost.outbox.Outbox` stored in the SQLite file
+    ``SPARKPOST_QUEUE_PATH`` if that setting is given, so that queued
+    messages survive restarts, else a
+    :class:`~sparkpost.outbox.MemoryOutbox` of at most
+    ``SPARKPOST_QUEUE_SIZE`` messages (10000 by default). Both deliver
+    ``SPARKPOST_MAX_CONCURRENCY`` messages at a time. At exit, the process
+    waits up to ``SPARKPOST_QUEUE_SHUTDOWN_TIMEOUT`` seconds (10 by default)
+    for messages in flight, and for an in-memory queue, queued ones.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            concurrency = getattr(settings, 'SPARKPOST_MAX_CONCURRENCY', 8)
+            client = get_client(
+                getattr(settings, 'SPARKPOST_API_KEY', None),
+                getattr(settings, 'SPARKPOST_BASE_URI', US_API),
+                concurrency)
+            path = getattr(settings, 'SPARKPOST_QUEUE_PATH', None)
+            if path:
+                outbox = Outbox(client.transmissions, path,
+                                concurrency=concurrency)
+            else:
+                outbox = MemoryOutbox(
+                    client.transmissions,
+                    maxsize=getattr(settings, 'SPARKPOST_QUEUE_SIZE', 10000),
+                    concurrency=concurrency)
+            outbox.start()
+            _outbox = outbox
+        return _outbox
+
+
+def close_outbox(timeout=None):
+    """
+    Stop the outbox of :class:`SparkPostQueuedEmailBackend`, waiting at most
+    ``timeout`` seconds for the messages in flight and, for an in-memory
+    queue, the queued ones. The next queued message starts a new outbox.
+    """
+    global _outbox
+    with _outbox_lock:
+        outbox, _outbox = _outbox, None
+    if outbox is not None:
+        outbox.stop(timeout)
+
+
+@atexit.register
+def _shutdown():
+    if _outbox is not None:
+        close_outbox(getattr(settings, 'SPARKPOST_QUEUE_SHUTDOWN_TIMEOUT',
+                             10))
+
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_uri=US_API, max_concurrency=8):
+    """
+    Client shared by the backends of the process that use ``api_key`` and
+    ``base_uri``. It is created on first use with a connection pool sized
+    for ``max_concurrency`` concurrent sends. A forked process gets clients
+    of its own, as connections cannot be shared with the parent.
+    """
+    global _clients_pid
+    key = (api_key, base_uri)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # Forget the clients of the parent without closing its sockets
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            # One pooled connection per concurrent send
+            transport = RequestsTransport(
+                pool_maxsize=max(10, max_concurrency))
+            client = _clients[key] = SparkPost(api_key, base_uri,
+                                               transport=transport)
+        return client
+
+
+def close_clients():
+    """
+    Close the connections of the clients shared by the backends. The next
+    backend creates a new client.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.transport.close()
+
+
+def _batch_key(message):
+    """
+    Key shared by the messages that can be sent as one transmission, or
+    ``None`` if ``message`` has to be sent on its own
+    """
+    # cc and bcc recipients see the to recipients of their message
+    if 'recipients' not in message or 'cc' in message or 'bcc' in message:
+        return None
+    rest = dict((key, value) for key, value in message.items()
+                if key != 'recipients')
+    try:
+        return json.dumps(rest, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
@@ -29,3 +29,21 @@ class SparkPostAPIException(SparkPostException):
             errors='\n'.join(errors)
         )
         super(SparkPostAPIException, self).__init__(message, *args, **kwargs)
+
+
+class SparkPostChunkedSendException(SparkPostException):
+    """
+    Raised when some chunks of a chunked transmission failed. ``result`` holds
+    the merged result of the chunks that were accepted and ``errors`` a list
+    of ``(chunk_index, exception)`` for the ones that were not.
+    """
+    def __init__(self, result, errors, *args, **kwargs):
+        self.result = result
+        self.errors = errors
+        message = "{failed} chunk(s) failed to send, errors:\n\n{errors}"
+        message = message.format(
+            failed=len(errors),
+            errors='\n'.join(str(error) for _, error in errors)
+        )
+        super(SparkPostChunkedSendException, self).__init__(message, *args,
+                                                            **kwargs)
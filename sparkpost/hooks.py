@@ -0,0 +1,166 @@
+from timeit import default_timer
+
+from .tracing import NOOP_TRACER
+
+
+PRE_REQUEST = 'pre_request'
+POST_RESPONSE = 'post_response'
+ON_ERROR = 'on_error'
+
+
+class RequestContext(object):
+    """
+    Describes one API call to the hooks. Times are in seconds.
+
+    :ivar str method: HTTP method
+    :ivar str resource: Key of the resource, e.g. ``'transmissions'``
+    :ivar str uri: Full request URI
+    :ivar str uri_template: Resource path with any id replaced, e.g.
+        ``'transmissions/{id}'``
+    :ivar int request_bytes: Size of the request body as sent, after any
+        compression
+    :ivar int bytes_saved: Bytes saved by compressing the request body
+    :ivar int response_bytes: Size of the last response body
+    :ivar int status: HTTP status of the last response
+    :ivar int attempts: Number of attempts, ``1`` unless retried
+    :ivar float ttfb: Time to the first byte of the last response
+    :ivar float elapsed: Total time of the call, retries included
+    :ivar result: Value returned to the caller, on success
+    :ivar error: Exception raised to the caller, on failure
+    :ivar dict data: Free for hooks to keep state across callbacks
+    :ivar span: Span of the call, if the client has a tracer
+    """
+
+    __slots__ = ('hooks', 'method', 'resource', 'uri', 'uri_template',
+                 'request_bytes', 'bytes_saved', 'response_bytes', 'status',
+                 'attempts', 'start', 'ttfb', 'elapsed', 'result', 'error',
+                 'data', 'tracer', 'span')
+
+    def __init__(self, hooks, method, resource, uri, uri_template,
+                 request_bytes=0, tracer=NOOP_TRACER):
+        self.hooks = hooks
+        self.method = method
+        self.resource = resource
+        self.uri = uri
+        self.uri_template = uri_template
+        self.request_bytes = request_bytes
+        self.bytes_saved = 0
+        self.response_bytes = None
+        self.status = None
+        self.attempts = 0
+        self.ttfb = None
+        self.elapsed = None
+        self.result = None
+        self.error = None
+        self.data = {}
+        self.tracer = tracer
+        self.span = None
+        if tracer.enabled:
+            self.span = tracer.start_span(
+                'SparkPost %s %s' % (method, uri_template), {
+                    'http.request.method': method,
+                    'url.full': uri,
+                    'url.template': uri_template,
+                    'sparkpost.resource': resource,
+                })
+        self.start = default_timer()
+
+    def phase(self, name, start, end):
+        """
+        Called by transports with the :func:`time.time` bounds of a step of
+        the call, such as ``'network'`` or ``'decode'``
+        """
+        if self.span is not None:
+            self.tracer.add_phase(self.span, name, start, end)
+
+    def compressed(self, data):
+        "Called by transports with the compressed request body"
+        self.bytes_saved = self.request_bytes - len(data)
+        self.request_bytes = len(data)
+
+    def finish(self, result):
+        "Called by transports once the call succeeded"
+        self.elapsed = default_timer() - self.start
+        self.result = result
+        self._end_span()
+        self.hooks.fire(POST_RESPONSE, self)
+
+    def fail(self, error):
+        "Called by transports once the call failed"
+        self.elapsed = default_timer() - self.start
+        self.error = error
+        self._end_span()
+        self.hooks.fire(ON_ERROR, self)
+
+    def _end_span(self):
+        span = self.span
+        if span is None:
+            return
+        if self.status is not None:
+            span.set_attribute('http.response.status_code', self.status)
+        span.set_attribute('sparkpost.attempts', self.attempts)
+        span.set_attribute('http.request.body.size', self.request_bytes)
+        self.tracer.end_span(span, self.error)
+
+
+class Hooks(object):
+    """
+    Callbacks run around every API call of a client, available as
+    ``client.hooks``. Each callback receives the :class:`RequestContext` of
+    the call:
+
+    * ``pre_request``, before the request is sent
+    * ``post_response``, once the call returned its result
+    * ``on_error``, once the call raised, with the exception in
+      ``context.error``
+
+    Exceptions raised by callbacks propagate to the caller. When no callback
+    is registered, calls pay a single attribute check.
+    """
+
+    events = (PRE_REQUEST, POST_RESPONSE, ON_ERROR)
+
+    def __init__(self):
+        self.active = False
+        self._callbacks = dict((event, ()) for event in self.events)
+
+    def register(self, event, callback=None):
+        """
+        Add ``callback`` to ``event``. Without ``callback``, return a
+        decorator that registers the decorated function.
+        """
+        if event not in self._callbacks:
+            raise ValueError('unknown hook event %r' % event)
+        if callback is None:
+            return lambda func: self.register(event, func)
+        # Tuples are replaced rather than mutated so that calls in flight
+        # in other threads iterate over a consistent set
+        self._callbacks[event] += (callback,)
+        self.active = True
+        return callback
+
+    def unregister(self, event, callback):
+        callbacks = list(self._callbacks[event])
+        callbacks.remove(callback)
+        self._callbacks[event] = tuple(callbacks)
+        self.active = any(self._callbacks.values())
+
+    def fire(self, event, context):
+        for callback in self._callbacks[event]:
+            callback(context)
+
+    def start(self, method, resource, uri, uri_template, data=None,
+              tracer=NOOP_TRACER):
+        "Build the context of a call and run the ``pre_request`` callbacks"
+        context = RequestContext(self, method, resource, uri, uri_template,
+                                 _body_size(data), tracer)
+        self.fire(PRE_REQUEST, context)
+        return context
+
+
+def _body_size(data):
+    if isinstance(data, type(u'')):
+        return len(data.encode('utf-8'))
+    if hasattr(data, '__len__'):
+        return len(data)
+    return 0
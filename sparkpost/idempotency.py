@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+# Transmission metadata field that carries the idempotency key, so that the
+# outcome of a send can be reconciled with message events and webhooks
+METADATA_KEY = 'idempotency_key'
+
+# Returned by IdempotencyStore.try_begin while another send of the key is in
+# flight
+IN_FLIGHT = object()
+
+# Seconds between checks of a key in flight by asynchronous clients, which
+# cannot block on the store
+POLL_INTERVAL = 0.01
+
+
+def payload_key(payload):
+    """
+    Deterministic idempotency key for a translated transmission payload: the
+    SHA-256 of its canonical JSON form
+    """
+    import hashlib
+    text = json.dumps(payload, sort_keys=True, separators=(',', ':'),
+                      default=_describe)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _describe(value):
+    # Streamed attachments are identified by their file rather than content
+    if hasattr(value, 'filename'):
+        return [value.filename, getattr(value, 'size', None)]
+    return repr(value)
+
+
+class IdempotencyStore(object):
+    """
+    Bounded record of the transmissions already accepted by the API, keyed
+    by idempotency key, so that sending the same transmission again returns
+    the first result instead of emailing the recipients twice. Opt in by
+    assigning an instance to :attr:`Transmissions.idempotency_store`, either
+    on one resource or on the class to share it across clients, including
+    asyncio and Tornado ones.
+
+    :param int max_entries: Keys remembered at most. The least recently used
+        ones are forgotten first
+    :param float ttl: Seconds a key is remembered, or ``None`` for as long
+        as it fits. Sends of identical content more than ``ttl`` apart are
+        both delivered
+
+    Sends of the same key from several threads or tasks are serialized: the
+    later ones wait for the first and return its result, or are sent if it
+    failed. A send that failed, including one that timed out, is not
+    recorded; the key in the transmission metadata tells whether it was
+    accepted after all.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._in_flight = set()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._condition:
+            return self._lookup(key) is not None
+
+    @property
+    def stats(self):
+        with self._condition:
+            return {'hits': self.hits, 'entries': len(self._entries),
+                    'in_flight': len(self._in_flight)}
+
+    def begin(self, key):
+        """
+        Called before sending ``key``.
+
+        :returns: the result recorded for ``key``, or ``None`` once ``key``
+            is marked in flight and must be sent, followed by :meth:`finish`
+        """
+        with self._condition:
+            while True:
+                result = self._begin(key)
+                if result is not IN_FLIGHT:
+                    return result
+                self._condition.wait()
+
+    def try_begin(self, key):
+        """
+        :meth:`begin` that does not wait for another send of ``key`` in
+        flight, for event loops that must not block.
+
+        :returns: :data:`IN_FLIGHT` while ``key`` is in flight, else as
+            :meth:`begin`
+        """
+        with self._condition:
+            return self._begin(key)
+
+    def finish(self, key, result=None, sent=True):
+        "Record the ``result`` of sending ``key``, unless ``sent`` is false"
+        with self._condition:
+            self._in_flight.discard(key)
+            if sent:
+                expires = time.time() + self.ttl if self.ttl else None
+                self._entries.pop(key, None)
+                self._entries[key] = (expires, result)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._condition.notify_all()
+
+    def clear(self):
+        with self._condition:
+            self._entries.clear()
+
+    def _begin(self, key):
+        if key in self._in_flight:
+            return IN_FLIGHT
+        entry = self._lookup(key)
+        if entry is not None:
+            self._entries[key] = self._entries.pop(key)
+            self.hits += 1
+            return entry[1]
+        self._in_flight.add(key)
+        return None
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is not None and \
+                entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        return entry
@@ -1,15 +1,6 @@
 from .base import Resource, RequestsTransport
 
 
-class Metrics(object):
-    "Wrapper for sub-resources"
-
-    def __init__(self, base_uri, api_key, transport_class=RequestsTransport):
-        self.base_uri = "%s/%s" % (base_uri, 'metrics')
-        self.campaigns = Campaigns(self.base_uri, api_key, transport_class)
-        self.domains = Domains(self.base_uri, api_key, transport_class)
-
-
 class Campaigns(Resource):
     key = 'campaigns'
 
@@ -24,3 +15,24 @@ class Domains(Resource):
     def list(self, **kwargs):
         results = self.request('GET', self.uri, **kwargs)
         return results['domains']
+
+
+class Metrics(object):
+    "Wrapper for sub-resources"
+
+    campaigns_class = Campaigns
+    domains_class = Domains
+
+    def __init__(self, base_uri, api_key, transport_class=RequestsTransport,
+                 transport=None, hooks=None, tracer=None):
+        self.base_uri = "%s/%s" % (base_uri, 'metrics')
+        if transport is None:
+            transport = transport_class()
+        self.campaigns = self.campaigns_class(self.base_uri, api_key,
+                                              transport_class,
+                                              transport=transport,
+                                              hooks=hooks, tracer=tracer)
+        self.domains = self.domains_class(self.base_uri, api_key,
+                                          transport_class,
+                                          transport=transport, hooks=hooks,
+                                          tracer=tracer)
@@ -0,0 +1,447 @@
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .bulk import dispatch
+from .exceptions import SparkPostAPIException, SparkPostException
+from .retry import IDEMPOTENT_METHODS, RetryPolicy
+
+
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    kwargs TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+
+class Outbox(object):
+    """
+    Durable local queue of transmissions, stored in a SQLite database.
+
+    :meth:`send` records the parameters of a transmission and returns a local
+    id without calling the API. Messages are delivered by :meth:`flush`, or
+    by a background thread started with :meth:`start`, through the regular
+    ``transmissions`` resource. Messages still queued when the process exits
+    are sent once an outbox is opened on the same file again.
+
+    :param transmissions: :class:`Transmissions` resource of a synchronous
+        client, e.g. ``sp.transmissions``
+    :param str path: SQLite database file. Only one process should flush a
+        given file
+    :param int batch_size: Messages claimed from the database at a time
+    :param int concurrency: Sends in flight at a time
+    :param float poll_interval: Seconds the background thread waits for new
+        messages between flushes
+    :param retry: :class:`RetryPolicy` deciding which failures are retried
+        and when. Defaults to five attempts with exponential backoff.
+        Messages are retried across restarts, so a message interrupted
+        mid-send may be delivered twice
+
+    Parameters must be serializable by the codec of the client, so
+    attachments are given by ``filename`` rather than as open files.
+    """
+
+    def __init__(self, transmissions, path, batch_size=100, concurrency=4,
+                 poll_interval=1.0, retry=None):
+        self.transmissions = transmissions
+        self.path = path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.retry = retry or _default_retry()
+        self.codec = transmissions.codec
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+            # Sends interrupted by a crash or restart go out again
+            self._db.execute('UPDATE outbox SET status = ? WHERE status = ?',
+                             (PENDING, SENDING))
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, **kwargs):
+        """
+        Queue a transmission. Takes the same parameters as
+        :meth:`Transmissions.send`. Unless given, the ``idempotency_key`` is
+        the local id, so every attempt carries the same key.
+
+        :returns: the local id of the message, for :meth:`status`
+        """
+        local_id = uuid.uuid4().hex
+        kwargs.setdefault('idempotency_key', local_id)
+        now = time.time()
+        data = self.codec.dumps(kwargs)
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT INTO outbox (id, kwargs, status, created, updated, '
+                'next_attempt) VALUES (?, ?, ?, ?, ?, ?)',
+                (local_id, data, PENDING, now, now, now))
+        self._wakeup.set()
+        return local_id
+
+    def status(self, local_id):
+        """
+        Look up a queued message.
+
+        :returns: a ``dict`` with ``status`` (``'pending'``, ``'sending'``,
+            ``'sent'`` or ``'failed'``), ``attempts``, ``created``,
+            ``updated``, the API ``result`` once sent and the last ``error``,
+            or ``None`` for an unknown id
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, attempts, created, updated, result, error '
+                'FROM outbox WHERE id = ?', (local_id,)).fetchone()
+        if row is None:
+            return None
+        status, attempts, created, updated, result, error = row
+        return {
+            'id': local_id,
+            'status': status,
+            'attempts': attempts,
+            'created': created,
+            'updated': updated,
+            'result': self.codec.loads(result) if result else None,
+            'error': error,
+        }
+
+    @property
+    def stats(self):
+        """
+        Number of messages in each status, and ``oldest_pending_age``, the
+        age in seconds of the oldest message not sent yet
+        """
+        stats = dict.fromkeys((PENDING, SENDING, SENT, FAILED), 0)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT status, COUNT(*), MIN(created) FROM outbox '
+                'GROUP BY status').fetchall()
+        oldest = None
+        for status, count, created in rows:
+            stats[status] = count
+            if status in (PENDING, SENDING):
+                oldest = created if oldest is None else min(oldest, created)
+        stats['oldest_pending_age'] = (
+            max(0.0, time.time() - oldest) if oldest is not None else 0.0)
+        return stats
+
+    def flush(self):
+        """
+        Send the messages that are due, ``batch_size`` at a time, until none
+        is left. Failures are retried later according to :attr:`retry`.
+
+        :returns: the number of delivery attempts made
+        """
+        attempted = 0
+        while not self._stopping.is_set():
+            batch = self._claim()
+            if not batch:
+                break
+            results = dispatch(self._deliver, batch, self.concurrency)
+            for _, row, result, error in results:
+                self._complete(row, result, error)
+            attempted += len(batch)
+        return attempted
+
+    def purge(self, max_age=0):
+        """
+        Delete sent and failed messages last updated more than ``max_age``
+        seconds ago.
+
+        :returns: the number of messages deleted
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'DELETE FROM outbox WHERE status IN (?, ?) AND updated <= ?',
+                (SENT, FAILED, time.time() - max_age))
+        return cursor.rowcount
+
+    def start(self):
+        "Flush in a background daemon thread until :meth:`stop` is called"
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='sparkpost-outbox')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the background thread once the sends in flight are done.
+        Queued messages stay in the database.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._stopping.clear()
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Keep the thread alive on a transient database error, such
+                # as a locked file; the next flush tries again
+                pass
+            self._wakeup.wait(self.poll_interval)
+
+    def _claim(self):
+        with self._lock, self._db:
+            rows = self._db.execute(
+                'SELECT id, kwargs, attempts FROM outbox '
+                'WHERE status = ? AND next_attempt <= ? '
+                'ORDER BY next_attempt, rowid LIMIT ?',
+                (PENDING, time.time(), self.batch_size)).fetchall()
+            self._db.executemany(
+                'UPDATE outbox SET status = ? WHERE id = ?',
+                [(SENDING, row[0]) for row in rows])
+        return rows
+
+    def _deliver(self, row):
+        local_id, data, attempts = row
+        if attempts == 0:
+            self.retry.on_request()
+        return self.transmissions.send(**self.codec.loads(data))
+
+    def _complete(self, row, result, error):
+        local_id, _, attempts = row
+        attempts += 1
+        now = time.time()
+        if error is None:
+            status, next_attempt = SENT, now
+            result, error = self.codec.dumps(result), None
+        else:
+            delay = _retry_delay(self.retry, attempts, error)
+            if delay is None:
+                status, next_attempt = FAILED, now
+            else:
+                status, next_attempt = PENDING, now + delay
+            result, error = None, str(error)
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE outbox SET status = ?, attempts = ?, updated = ?, '
+                'next_attempt = ?, result = ?, error = ? WHERE id = ?',
+                (status, attempts, now, next_attempt, result, error,
+                 local_id))
+
+
+class MemoryOutbox(object):
+    """
+    In-process queue of transmissions delivered by a pool of background
+    threads, for when a message lost with the process is acceptable. Same
+    interface as :class:`Outbox`, without :meth:`Outbox.status` and
+    :meth:`Outbox.purge`.
+
+    :param transmissions: :class:`Transmissions` resource of a synchronous
+        client, e.g. ``sp.transmissions``
+    :param int maxsize: Messages the queue holds at most. :meth:`send`
+        raises :exc:`SparkPostException` when it is full
+    :param int concurrency: Delivery threads, so sends in flight at a time
+    :param retry: :class:`RetryPolicy` deciding which failures are retried
+        and when. Defaults to five attempts with exponential backoff. A
+        delivery thread waits for the backoff of the message it retries
+
+    The last 100 failures are kept in :attr:`errors` as ``(kwargs,
+    exception)`` pairs.
+    """
+
+    def __init__(self, transmissions, maxsize=10000, concurrency=4,
+                 retry=None):
+        self.transmissions = transmissions
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.retry = retry or _default_retry()
+        self.errors = deque(maxlen=100)
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = None
+        self._counts = {SENDING: 0, SENT: 0, FAILED: 0}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, **kwargs):
+        """
+        Queue a transmission. Takes the same parameters as
+        :meth:`Transmissions.send`. Unless given, the ``idempotency_key`` is
+        the local id, so every attempt carries the same key.
+
+        :returns: the local id of the message
+        """
+        local_id = uuid.uuid4().hex
+        kwargs.setdefault('idempotency_key', local_id)
+        try:
+            self._queue.put_nowait((time.time(), kwargs))
+        except queue.Full:
+            raise SparkPostException(
+                'Outbox is full with %d messages' % self.maxsize)
+        return local_id
+
+    @property
+    def stats(self):
+        """
+        Number of messages in each status, and ``oldest_pending_age``, the
+        age in seconds of the oldest message not sent yet
+        """
+        with self._queue.mutex:
+            pending = list(self._queue.queue)
+        with self._lock:
+            stats = dict(self._counts)
+        stats[PENDING] = len(pending)
+        stats['oldest_pending_age'] = (
+            max(0.0, time.time() - pending[0][0]) if pending else 0.0)
+        return stats
+
+    def flush(self):
+        """
+        Wait until every queued message is sent or has failed. Without
+        delivery threads, the messages are sent from the calling thread.
+        """
+        if self._threads:
+            self._queue.join()
+            return
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(item)
+
+    def start(self):
+        "Start the delivery threads, until :meth:`stop` is called"
+        if self._threads:
+            return
+        # One event per start, so that threads left running by a stop that
+        # timed out still exit once the queue is empty
+        self._stopping = threading.Event()
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._run,
+                                      args=(self._stopping,),
+                                      name='sparkpost-outbox-%d' % index)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Stop the delivery threads once the messages queued so far are sent,
+        waiting at most ``timeout`` seconds for them. Threads still busy at
+        the deadline finish the queue in the background.
+        """
+        if not self._threads:
+            return
+        deadline = time.time() + timeout if timeout is not None else None
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(None if deadline is None
+                        else max(0.0, deadline - time.time()))
+        self._threads = []
+
+    def close(self):
+        self.stop()
+
+    def _run(self, stopping):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                # Queued messages are delivered before stopping
+                if stopping.is_set():
+                    return
+                continue
+            self._process(item)
+
+    def _process(self, item):
+        _, kwargs = item
+        with self._lock:
+            self._counts[SENDING] += 1
+        self.retry.on_request()
+        attempt, status = 1, FAILED
+        try:
+            while True:
+                try:
+                    self.transmissions.send(**kwargs)
+                except Exception as ex:
+                    delay = _retry_delay(self.retry, attempt, ex)
+                    if delay is None:
+                        self.errors.append((kwargs, ex))
+                        break
+                    time.sleep(delay)
+                    attempt += 1
+                else:
+                    status = SENT
+                    break
+        finally:
+            with self._lock:
+                self._counts[SENDING] -= 1
+                self._counts[status] += 1
+            self._queue.task_done()
+
+
+def _default_retry():
+    return RetryPolicy(max_attempts=5, backoff_factor=1, max_backoff=300,
+                       methods=IDEMPOTENT_METHODS | {'POST'})
+
+
+def _retry_delay(retry, attempt, error):
+    """
+    Seconds to wait before sending a message again after ``error``, or
+    ``None`` to give up
+    """
+    if isinstance(error, SparkPostAPIException):
+        headers = getattr(error.response, 'headers', None) or {}
+        return retry.next_delay('POST', attempt, error.status,
+                                headers.get('Retry-After'))
+    if isinstance(error, SparkPostException):
+        # Invalid parameters will not get any better
+        return None
+    # Connection errors, timeouts...
+    return retry.next_delay('POST', attempt)
@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    Token bucket refilled at ``rate`` tokens per second and holding at most
+    ``capacity`` tokens. It is safe to share between threads and asyncio
+    tasks: :meth:`reserve` never blocks, it books a token and returns how long
+    the caller has to wait before using it.
+
+    :param float rate: Requests allowed per second in steady state
+    :param float capacity: Largest burst allowed. Defaults to ``rate``, and
+        is at least one token
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity or rate))
+        self.tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token, going into debt if the bucket is empty.
+
+        :returns: seconds to wait before the reserved token may be used
+        """
+        with self._lock:
+            now = time.time()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        "Block the calling thread until a token is available"
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class RateLimiter(object):
+    """
+    Client-side rate limiter for the transports, with an optional budget per
+    API resource. Resources are named after their URL segment, e.g.::
+
+        RateLimiter(default=TokenBucket(20),
+                    per_resource={'transmissions': TokenBucket(10),
+                                  'suppression-list': TokenBucket(2)})
+
+    :param default: :class:`TokenBucket` for requests to resources without a
+        budget of their own. ``None`` leaves them unlimited
+    :param dict per_resource: Maps resource keys to a :class:`TokenBucket`
+    """
+
+    def __init__(self, default=None, per_resource=None):
+        self.default = default
+        self.per_resource = dict(per_resource or {})
+
+    def bucket_for(self, uri):
+        if self.per_resource:
+            for segment in uri.split('/'):
+                if segment in self.per_resource:
+                    return self.per_resource[segment]
+        return self.default
+
+    def reserve(self, uri):
+        """
+        Book a token for a request to ``uri``.
+
+        :returns: seconds to wait before sending the request
+        """
+        bucket = self.bucket_for(uri)
+        if bucket is None:
+            return 0.0
+        return bucket.reserve()
+
+    def acquire(self, uri):
+        "Block the calling thread until a request to ``uri`` may be sent"
+        delay = self.reserve(uri)
+        if delay:
+            time.sleep(delay)
@@ -1,5 +1,3 @@
-import json
-
 from .base import Resource
 
 
@@ -40,7 +38,8 @@ class RecipientLists(Resource):
         :raises: :exc:`SparkPostAPIException` if API call fails
         """
         payload = self._translate_keys(**kwargs)
-        results = self.request('POST', self.uri, data=json.dumps(payload))
+        data = self.codec.dumps(payload)
+        results = self.request('POST', self.uri, data=data)
         return results
 
     def update(self, list_id, **kwargs):
@@ -59,7 +58,8 @@ class RecipientLists(Resource):
         """
         uri = "%s/%s" % (self.uri, list_id)
         payload = self._translate_keys(**kwargs)
-        results = self.request('PUT', uri, data=json.dumps(payload))
+        data = self.codec.dumps(payload)
+        results = self.request('PUT', uri, data=data)
         return results
 
     def delete(self, list_id):
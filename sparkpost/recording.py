@@ -0,0 +1,221 @@
+import base64
+import gzip
+import io
+import json
+import threading
+import time
+
+from .base import RequestsTransport
+from .exceptions import SparkPostException
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+# Response headers worth keeping; the API key is in a request header and
+# request headers are never recorded
+RECORDED_HEADERS = ('Content-Type', 'Retry-After')
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'),
+                                encoding='utf-8')
+    return io.open(path, mode, encoding='utf-8')
+
+
+def _request_key(method, uri, params):
+    # Hosts are left out so that a recording of the US API replays for an
+    # EU client, and the other way around
+    path = urlsplit(uri).path
+    return '%s %s %s' % (method.upper(), path,
+                         json.dumps(params, sort_keys=True) if params else '')
+
+
+def _encode_body(data):
+    if data is None:
+        return {}
+    if hasattr(data, 'read'):
+        data.seek(0)
+        data = data.read()
+    if not isinstance(data, bytes):
+        return {'body': data}
+    try:
+        return {'body': data.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'body_base64': base64.b64encode(data).decode('ascii')}
+
+
+def _decode_body(record):
+    if 'body_base64' in record:
+        return base64.b64decode(record['body_base64'])
+    return record.get('body', '').encode('utf-8')
+
+
+class RecordingTransport(RequestsTransport):
+    """
+    :class:`RequestsTransport` that also appends every exchange with the API,
+    retries included, to a JSON lines file (gzip compressed when ``path``
+    ends with ``.gz``), for :class:`ReplayTransport` to serve back later.
+
+    Each line holds the method, URI and query parameters, the request body
+    unless ``request_bodies`` is false, the response status, body and
+    ``Content-Type``/``Retry-After`` headers, and the time to the first
+    byte and total time of the exchange. Request headers, and so the API
+    key, are not recorded.
+
+    :param str path: File to write. An existing recording is appended to
+    :param bool request_bodies: Record request bodies. Replaying does not
+        need them
+
+    Other arguments are passed to :class:`RequestsTransport`.
+    """
+
+    def __init__(self, path, request_bodies=True, **kwargs):
+        super(RecordingTransport, self).__init__(**kwargs)
+        self.path = path
+        self.request_bodies = request_bodies
+        self._file = _open(path, 'a')
+        self._write_lock = threading.Lock()
+
+    def _send(self, method, uri, headers, kwargs, context=None):
+        started = time.time()
+        response = super(RecordingTransport, self)._send(
+            method, uri, headers, kwargs, context)
+        elapsed = time.time() - started
+        record = {
+            'method': method.upper(),
+            'uri': uri,
+            'params': kwargs.get('params'),
+            'time': started,
+            'status': response.status_code,
+            'headers': dict((name, response.headers[name])
+                            for name in RECORDED_HEADERS
+                            if name in response.headers),
+            'ttfb': response.elapsed.total_seconds(),
+            'elapsed': elapsed,
+            'response': _encode_body(response.content),
+        }
+        if self.request_bodies:
+            record['request'] = _encode_body(kwargs.get('data'))
+        line = json.dumps(record, sort_keys=True, separators=(',', ':'))
+        with self._write_lock:
+            self._file.write(line + u'\n')
+            self._file.flush()
+        return response
+
+    def close(self):
+        super(RecordingTransport, self).close()
+        with self._write_lock:
+            self._file.close()
+
+
+class ReplayResponse(object):
+    "Recorded response, standing in for ``requests.Response``"
+
+    def __init__(self, record):
+        self.url = record['uri']
+        self.status_code = record['status']
+        self.headers = record.get('headers') or {}
+        self.content = _decode_body(record['response'])
+        self.ttfb = record.get('ttfb') or 0.0
+        self.latency = record.get('elapsed') or 0.0
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    @property
+    def elapsed(self):
+        return _Elapsed(self.ttfb)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _Elapsed(object):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def total_seconds(self):
+        return self.seconds
+
+
+class ReplayTransport(RequestsTransport):
+    """
+    Transport answering from a recording made by :class:`RecordingTransport`
+    without any network access, e.g. to load test or profile a sending
+    pipeline offline.
+
+    Requests are matched on method, path and query parameters. Each match
+    gets the next response recorded for it, in order; once they are used
+    up, they are served again from the first when ``loop`` is true, else
+    :exc:`SparkPostException` is raised. Unmatched requests raise
+    :exc:`SparkPostException` too.
+
+    :param str path: Recording to serve
+    :param float speed: ``None`` or ``0`` answers at once; otherwise every
+        response is delayed by its recorded duration divided by ``speed``,
+        e.g. ``1`` for real time or ``10`` for ten times faster
+    :param bool loop: Serve the responses of a request again once used up
+
+    Other arguments are passed to :class:`RequestsTransport`; retries, rate
+    limiting, compression and hooks apply to replayed calls as they do to
+    real ones.
+    """
+
+    def __init__(self, path, speed=None, loop=True, **kwargs):
+        super(ReplayTransport, self).__init__(**kwargs)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.responses = {}
+        self._positions = {}
+        self._replay_lock = threading.Lock()
+        # Nothing goes over the network, so there is nothing to retry on but
+        # error responses
+        self._network_errors = ()
+        with _open(path, 'r') as a_file:
+            for line in a_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = _request_key(record['method'], record['uri'],
+                                   record.get('params'))
+                self.responses.setdefault(key, []).append(
+                    ReplayResponse(record))
+
+    def _send(self, method, uri, headers, kwargs, context=None):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(uri)
+        response = self._next_response(method, uri, kwargs.get('params'))
+        sent = time.time()
+        if self.speed:
+            time.sleep(response.latency / self.speed)
+        if context is not None:
+            context.attempts += 1
+            context.phase('network', sent, time.time())
+            context.status = response.status_code
+            context.ttfb = response.ttfb
+            context.response_bytes = len(response.content)
+        return response
+
+    def _next_response(self, method, uri, params):
+        key = _request_key(method, uri, params)
+        with self._replay_lock:
+            responses = self.responses.get(key)
+            if not responses:
+                raise SparkPostException('No recorded response for %s' % key)
+            position = self._positions.get(key, 0)
+            if position >= len(responses):
+                if not self.loop:
+                    raise SparkPostException(
+                        'Recorded responses for %s are used up' % key)
+                position = 0
+            self._positions[key] = position + 1
+        return responses[position]
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class RetryBudget(object):
+    """
+    Limits retries to a fraction of the traffic so that an API outage does
+    not turn into a retry storm. Every request deposits ``ratio`` tokens, up
+    to ``max_tokens``, and every retry withdraws one. When the budget is
+    empty, failures are returned to the caller instead of being retried.
+
+    :param float ratio: Retries allowed per request, e.g. ``0.2`` allows one
+        retry for every five requests in steady state
+    :param float initial_tokens: Tokens available before any request is made
+    :param float max_tokens: Maximum number of tokens kept in the budget
+    """
+
+    def __init__(self, ratio=0.2, initial_tokens=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min(initial_tokens, max_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Retry policy applied by the transports to failed API calls. Only
+    idempotent methods are retried unless ``methods`` says otherwise, e.g.
+    pass ``IDEMPOTENT_METHODS | {'POST'}`` to also retry transmissions.
+
+    :param int max_attempts: Total number of attempts, including the first
+    :param float backoff_factor: Delay before the first retry, in seconds.
+        It doubles with every further attempt
+    :param float max_backoff: Upper bound for any delay, in seconds. A
+        ``Retry-After`` asking for longer makes the call give up instead
+    :param bool jitter: Pick each delay at random between zero and the
+        computed backoff ("full jitter")
+    :param statuses: HTTP statuses to retry. Connection errors and timeouts
+        are always retried
+    :param methods: HTTP methods that may be retried
+    :param bool respect_retry_after: Wait at least as long as the
+        ``Retry-After`` response header asks
+    :param budget: :class:`RetryBudget` shared by every call made with this
+        policy. Defaults to ``RetryBudget()``
+
+    ``retries`` and ``give_ups`` count retries performed and retryable
+    failures that were returned to the caller once attempts or budget ran
+    out. :attr:`stats` returns both.
+    """
+
+    def __init__(self, max_attempts=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, statuses=RETRY_STATUSES,
+                 methods=IDEMPOTENT_METHODS, respect_retry_after=True,
+                 budget=None):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+        self.retries = 0
+        self.give_ups = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        return {'retries': self.retries, 'give_ups': self.give_ups}
+
+    def on_request(self):
+        "Called once per API call, before its first attempt"
+        self.budget.deposit()
+
+    def next_delay(self, method, attempt, status=None, retry_after=None):
+        """
+        Decide whether a failed attempt is retried.
+
+        :param str method: HTTP method of the call
+        :param int attempt: Number of the attempt that failed, starting at 1
+        :param int status: HTTP status, or ``None`` for a connection error
+        :param str retry_after: Value of the ``Retry-After`` header, if any
+
+        :returns: seconds to wait before the next attempt, or ``None`` if the
+            failure must be returned to the caller
+        """
+        if method.upper() not in self.methods:
+            return None
+        if status is not None and status not in self.statuses:
+            return None
+        delay = self.backoff(attempt)
+        wait = self.parse_retry_after(retry_after)
+        if wait is not None and self.respect_retry_after:
+            delay = max(delay, wait)
+        if (attempt >= self.max_attempts or delay > self.max_backoff or
+                not self.budget.withdraw()):
+            self._count('give_ups')
+            return None
+        self._count('retries')
+        return delay
+
+    def backoff(self, attempt):
+        delay = min(self.max_backoff,
+                    self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value):
+        "Parse a ``Retry-After`` header, in seconds or as an HTTP date"
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(0.0, mktime_tz(parsed) - time.time())
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
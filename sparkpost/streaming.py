@@ -0,0 +1,112 @@
+import base64
+import os
+import re
+
+# Multiple of 3 so that base64 chunks concatenate into a valid encoding
+READ_SIZE = 3 * 16 * 1024
+
+
+class Base64File(object):
+    """
+    Placeholder for the base64 encoding of a file, produced chunk by chunk
+    when the request body is sent instead of being held in memory.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.size = os.path.getsize(filename)
+
+    def __len__(self):
+        return 4 * ((self.size + 2) // 3)
+
+    def __iter__(self):
+        with open(self.filename, 'rb') as a_file:
+            while True:
+                chunk = a_file.read(READ_SIZE)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk)
+
+    def encode(self):
+        "Return the whole encoding as a ``str``"
+        return b''.join(self).decode('ascii')
+
+
+class StreamingBody(object):
+    """
+    File-like request body made of ``bytes`` parts and :class:`Base64File`
+    parts. Its length is known up front, so it is sent with a
+    ``Content-Length`` header, and only one chunk of each file is in memory
+    at a time. :meth:`seek` back to ``0`` to send it again, e.g. on retry.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self._length = sum(len(part) for part in parts)
+        self.seek(0)
+
+    @classmethod
+    def from_payload(cls, payload, codec, files):
+        """
+        Serialize ``payload`` with ``codec``, streaming the values that are
+        :class:`Base64File` instances. ``files`` lists the dicts whose
+        ``data`` holds one; they are modified in place.
+        """
+        import uuid
+        prefix = '@@sparkpost-stream-%s-' % uuid.uuid4().hex
+        streamed = []
+        for holder in files:
+            streamed.append(holder['data'])
+            holder['data'] = '%s%d@@' % (prefix, len(streamed) - 1)
+        # Files are spliced in the order their markers were serialized,
+        # whatever the order of the payload keys
+        pieces = re.split(re.escape(prefix) + r'(\d+)@@', codec.dumps(payload))
+        parts = [pieces[0].encode('utf-8')]
+        for index, text in zip(pieces[1::2], pieces[2::2]):
+            parts.extend([streamed[int(index)], text.encode('utf-8')])
+        return cls(parts)
+
+    def __len__(self):
+        return self._length
+
+    def _iter_parts(self):
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+            else:
+                for chunk in part:
+                    yield chunk
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        if whence == 2 and offset == 0:
+            self._chunks = iter(())
+            self._buffer = b''
+            self._position = self._length
+        elif whence == 0 and offset == 0:
+            self._chunks = self._iter_parts()
+            self._buffer = b''
+            self._position = 0
+        elif (whence, offset) != (0, self._position):
+            raise IOError('StreamingBody can only seek to its start or end')
+        return self._position
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def __iter__(self):
+        return iter(lambda: self.read(READ_SIZE), b'')
@@ -1,5 +1,3 @@
-import json
-
 from .base import Resource
 
 
@@ -58,7 +56,7 @@ class SuppressionList(Resource):
             uri = "%s/%s" % (self.uri, status.pop("email", None))
         else:
             status = {"recipients": status}
-        results = self.request('PUT', uri, data=json.dumps(status))
+        results = self.request('PUT', uri, data=self.codec.dumps(status))
         return results
 
     def create(self, entry):
@@ -1,5 +1,3 @@
-import json
-
 from .base import Resource
 
 
@@ -70,7 +68,8 @@ class Templates(Resource):
             sending domain or there's a syntax error in the content
         """
         payload = self._translate_keys(**kwargs)
-        results = self.request('POST', self.uri, data=json.dumps(payload))
+        data = self.codec.dumps(payload)
+        results = self.request('POST', self.uri, data=data)
         return results
 
     def update(self, template_id, **kwargs):
@@ -107,7 +106,8 @@ class Templates(Resource):
         """
         uri = "%s/%s" % (self.uri, template_id)
         payload = self._translate_keys(**kwargs)
-        results = self.request('PUT', uri, data=json.dumps(payload))
+        data = self.codec.dumps(payload)
+        results = self.request('PUT', uri, data=data)
         return results
 
     def delete(self, template_id):
@@ -175,7 +175,7 @@ class Templates(Resource):
         params = {}
         if draft is not None:
             params['draft'] = str(draft).lower()
-        data = json.dumps({'substitution_data': substitution_data})
+        data = self.codec.dumps({'substitution_data': substitution_data})
         results = self.request('POST',
                                uri,
                                params=params,
@@ -1,4 +1,5 @@
 import sparkpost
+from sparkpost.base import LazyResource
 
 from .exceptions import SparkPostAPIException
 from .base import TornadoTransport
@@ -11,8 +12,4 @@ __all__ = ["SparkPost", "TornadoTransport", "SparkPostAPIException",
 class SparkPost(sparkpost.SparkPost):
     TRANSPORT_CLASS = TornadoTransport
 
-    def __init__(self, *args, **kwargs):
-        super(SparkPost, self).__init__(*args, **kwargs)
-        self.transmissions = Transmissions(self.base_uri, self.api_key,
-                                           self.TRANSPORT_CLASS)
-        self.transmission = self.transmissions
+    transmissions = LazyResource('transmissions', Transmissions)
@@ -1,33 +1,131 @@
-import json
+import time
+
 from tornado import gen
 from tornado.httpclient import AsyncHTTPClient, HTTPError
 
+from ..codec import JSONCodec
 from .exceptions import SparkPostAPIException
 
 
 class TornadoTransport(object):
-    @gen.coroutine
+    supports_context = True
+
+    def __init__(self, codec=None, retry=None, rate_limiter=None,
+                 compression=None):
+        self.codec = codec or JSONCodec()
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.compression = compression
+
     def request(self, method, uri, headers, **kwargs):
+        context = kwargs.pop('context', None)
+        if self.compression is not None and kwargs.get('data') is not None:
+            headers, kwargs['data'] = self.compression.compress(
+                headers, kwargs['data'])
+            if context is not None and 'Content-Encoding' in headers:
+                context.compressed(kwargs['data'])
+        if context is None:
+            return self._request(method, uri, headers, kwargs)
+        return self._instrumented_request(method, uri, headers, kwargs,
+                                          context)
+
+    @gen.coroutine
+    def _instrumented_request(self, method, uri, headers, kwargs, context):
+        try:
+            result = yield self._request(method, uri, headers, kwargs,
+                                         context)
+        except Exception as ex:
+            context.fail(ex)
+            raise
+        context.finish(result)
+        raise gen.Return(result)
+
+    @gen.coroutine
+    def _request(self, method, uri, headers, kwargs, context=None):
         if "data" in kwargs:
             kwargs["body"] = kwargs.pop("data")
         client = AsyncHTTPClient()
-        try:
-            response = yield client.fetch(uri, method=method, headers=headers,
-                                          **kwargs)
-        except HTTPError as ex:
-            raise SparkPostAPIException(ex.response)
+        if self.retry is not None:
+            self.retry.on_request()
+        attempt = 1
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(uri)
+                if delay:
+                    yield gen.sleep(delay)
+            try:
+                response = yield self._fetch(client, method, uri, headers,
+                                             kwargs, context)
+                break
+            except HTTPError as ex:
+                delay = self._retry_delay(method, attempt, ex)
+                if delay is None:
+                    if ex.response is None:
+                        raise
+                    raise SparkPostAPIException(ex.response)
+            except (IOError, OSError):
+                # Connection refused, reset, DNS failure...
+                if self.retry is None:
+                    raise
+                delay = self.retry.next_delay(method, attempt)
+                if delay is None:
+                    raise
+            yield gen.sleep(delay)
+            attempt += 1
         if response.code == 204:
             raise gen.Return(True)
         if response.code == 200:
             result = None
+            decoding = time.time()
             # noinspection PyBroadException
             try:
-                result = json.loads(response.body.decode("utf-8"))
+                result = self.codec.loads(response.body)
             # TODO: select exception to catch here
             except:  # noqa: E722
                 pass
+            if context is not None:
+                context.phase('decode', decoding, time.time())
             if result:
                 if 'results' in result:
                     raise gen.Return(result['results'])
                 raise gen.Return(result)
         raise SparkPostAPIException(response)
+
+    def _fetch(self, client, method, uri, headers, kwargs, context):
+        if context is None:
+            return client.fetch(uri, method=method, headers=headers, **kwargs)
+        return self._instrumented_fetch(client, method, uri, headers, kwargs,
+                                        context)
+
+    @gen.coroutine
+    def _instrumented_fetch(self, client, method, uri, headers, kwargs,
+                            context):
+        context.attempts += 1
+        sent = time.time()
+        try:
+            response = yield client.fetch(uri, method=method,
+                                          headers=headers, **kwargs)
+        except HTTPError as ex:
+            self._record(context, ex.response)
+            raise
+        finally:
+            context.phase('network', sent, time.time())
+        self._record(context, response)
+        raise gen.Return(response)
+
+    def _record(self, context, response):
+        if response is None:
+            return
+        context.status = response.code
+        context.response_bytes = len(response.body or b'')
+        # Only the curl client reports the time to the first byte
+        context.ttfb = response.time_info.get('starttransfer')
+
+    def _retry_delay(self, method, attempt, error):
+        if self.retry is None:
+            return None
+        if error.response is None:
+            # Tornado reports timeouts and connection errors as code 599
+            return self.retry.next_delay(method, attempt)
+        return self.retry.next_delay(method, attempt, error.code,
+                                     error.response.headers.get('Retry-After'))
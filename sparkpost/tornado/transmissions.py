@@ -1,8 +1,75 @@
-from .utils import wrap_future
-from ..transmissions import Transmissions as SyncTransmissions
+import time
+
+from tornado import gen
+
+from .utils import dispatch, wrap_future
+from ..bulk import BulkResults, SendResult, record_result
+from ..idempotency import IN_FLIGHT, POLL_INTERVAL
+from ..transmissions import Transmissions as SyncTransmissions, _merge_chunks
 
 
 class Transmissions(SyncTransmissions):
+    attachment_stream_threshold = None
+
     def get(self, transmission_id):
         results = self._fetch_get(transmission_id)
         return wrap_future(results, lambda f: f["transmission"])
+
+    @gen.coroutine
+    def _send_once(self, store, key, data):
+        while True:
+            results = store.try_begin(key)
+            if results is not IN_FLIGHT:
+                break
+            yield gen.sleep(POLL_INTERVAL)
+        if results is not None:
+            raise gen.Return(results)
+        try:
+            results = yield self.request('POST', self.uri, data=data)
+        except Exception:
+            store.finish(key, sent=False)
+            raise
+        store.finish(key, results)
+        raise gen.Return(results)
+
+    @gen.coroutine
+    def send_chunked(self, chunk_size=10000, concurrency=4, **kwargs):
+        """
+        Send a transmission whose recipient list is split into several API
+        requests of at most ``chunk_size`` recipients, at most
+        ``concurrency`` at a time. See the synchronous
+        :meth:`~sparkpost.transmissions.Transmissions.send_chunked`.
+
+        :returns: a future resolving to the merged results
+        """
+        chunks, send_chunk = self._chunks(chunk_size, kwargs)
+        results = yield dispatch(lambda item: send_chunk(*item),
+                                 enumerate(chunks), concurrency)
+        raise gen.Return(_merge_chunks(
+            (index, result, error) for index, _, result, error in results))
+
+    @gen.coroutine
+    def send_many(self, transmissions, concurrency=8):
+        """
+        Send many transmissions concurrently, at most ``concurrency`` at a
+        time.
+
+        :param transmissions: Iterable of ``dict``, each holding the keyword
+            arguments for one :meth:`send` call. It is consumed lazily
+        :param int concurrency: Maximum number of requests in flight
+
+        :returns: a future resolving to a :class:`~sparkpost.bulk.BulkResults`
+            list of ``SendResult(index, kwargs, result, error)``, one per
+            transmission, in input order. Failures are reported in ``error``
+            rather than raised. Its ``stats`` hold counts, elapsed time and
+            throughput
+        """
+        start = time.time()
+        outcomes = yield dispatch(lambda kwargs: self.send(**kwargs),
+                                  transmissions, concurrency)
+        results = BulkResults()
+        elapsed = time.time() - start
+        for outcome in outcomes:
+            results.append(SendResult(*outcome))
+            record_result(results.stats, outcome[2], outcome[3], elapsed)
+        raise gen.Return(results)
@@ -1,3 +1,4 @@
+from tornado import gen
 from tornado.concurrent import Future
 
 
@@ -12,3 +13,31 @@ def wrap_future(future, convert):
 
     future.add_done_callback(handle_future)
     return wrapper
+
+
+@gen.coroutine
+def dispatch(func, items, concurrency):
+    """
+    Coroutine counterpart of :func:`sparkpost.bulk.dispatch`: call
+    ``func(item)``, which returns a future, for every item with at most
+    ``concurrency`` calls in flight. Resolves to a list of ``(index, item,
+    result, error)`` tuples in input order.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    items = enumerate(items)
+    results = {}
+
+    @gen.coroutine
+    def worker():
+        # Workers share the iterator, so it is consumed lazily
+        for index, item in items:
+            try:
+                result = yield func(item)
+            except Exception as ex:
+                results[index] = (index, item, None, ex)
+            else:
+                results[index] = (index, item, result, None)
+
+    yield gen.multi([worker() for _ in range(concurrency)])
+    raise gen.Return([results[index] for index in sorted(results)])
@@ -0,0 +1,100 @@
+class _NoopSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer(object):
+    """
+    Tracer of a client that records nothing, the default. Subclass it to
+    send spans elsewhere; :class:`OpenTelemetryTracer` is one such adapter.
+
+    A client traces:
+
+    * ``sparkpost.build_payload``: translating the parameters of a
+      transmission, attachment encoding included
+    * ``sparkpost.serialize``: JSON serialization of the request body
+    * a span per API call, named after its method and URI template, e.g.
+      ``SparkPost POST transmissions``, with child spans for every
+      ``network`` attempt and for ``decode``, the response parsing
+
+    Attachments streamed while sending are encoded during ``network``.
+    """
+
+    #: Whether spans are recorded. Calls skip all tracing work when false
+    enabled = False
+
+    def span(self, name, attributes=None):
+        """
+        Context manager timing a block of client code, nested in the
+        current span
+        """
+        return NOOP_SPAN
+
+    def start_span(self, name, attributes=None):
+        "Start the span of an API call, ended by :meth:`end_span`"
+        return NOOP_SPAN
+
+    def add_phase(self, parent, name, start, end):
+        """
+        Record a finished child span of ``parent``, between ``start`` and
+        ``end`` given as :func:`time.time` timestamps
+        """
+
+    def end_span(self, span, error=None):
+        "End ``span``, marking it failed if ``error`` is given"
+
+
+NOOP_TRACER = Tracer()
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer emitting OpenTelemetry spans. Requires the ``opentelemetry-api``
+    package.
+
+    :param tracer: OpenTelemetry ``Tracer``. Defaults to one named
+        ``sparkpost`` from the global tracer provider
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+        if tracer is None:
+            import sparkpost
+            tracer = trace.get_tracer('sparkpost', sparkpost.__version__)
+        self.tracer = tracer
+        self._trace = trace
+
+    def span(self, name, attributes=None):
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+    def start_span(self, name, attributes=None):
+        return self.tracer.start_span(name, kind=self._trace.SpanKind.CLIENT,
+                                      attributes=attributes)
+
+    def add_phase(self, parent, name, start, end):
+        context = self._trace.set_span_in_context(parent)
+        span = self.tracer.start_span(name, context=context,
+                                      start_time=_nanoseconds(start))
+        span.end(end_time=_nanoseconds(end))
+
+    def end_span(self, span, error=None):
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(self._trace.Status(
+                self._trace.StatusCode.ERROR, str(error)))
+        span.end()
+
+
+def _nanoseconds(timestamp):
+    return int(timestamp * 1e9)
@@ -1,11 +1,13 @@
 import base64
-import copy
-import json
+import os
+import re
 import warnings
 from email.utils import parseaddr
 
 from .base import Resource
-from .exceptions import SparkPostException
+from .exceptions import SparkPostChunkedSendException, SparkPostException
+from .idempotency import METADATA_KEY, payload_key
+from .streaming import Base64File, StreamingBody
 
 
 try:
@@ -13,6 +15,43 @@ try:
 except NameError:
     string_types = str  # Python 3 doesn't have basestring
 
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2 has no lru_cache, parse without memoization
+    def lru_cache(maxsize):
+        return lambda func: func
+
+
+# Addresses that parseaddr would return unchanged, either bare
+# ("a@example.com") or with a plain display name ("Jane Doe <a@example.com>")
+email_pattern = r'[^\s<>()",;:\[\]\\@]+@[^\s<>()",;:\[\]\\@]+'
+plain_address = re.compile('^%s$' % email_pattern)
+named_address = re.compile(
+    r"^([^\W_](?:[\w'-]| (?=[\w'-]))*) <(%s)>$" % email_pattern, re.U)
+
+
+@lru_cache(maxsize=4096)
+def _parseaddr(address):
+    return parseaddr(address)
+
+
+def parse_address(address):
+    "Same as parseaddr, without the cost of the full parser for most input"
+    if plain_address.match(address):
+        return '', address
+    match = named_address.match(address)
+    if match:
+        return match.groups()
+    return _parseaddr(address)
+
+
+@lru_cache(maxsize=4096)
+def format_header_to(email, name=None):
+    if name is None:
+        return email
+    return '"{name}" <{email}>'.format(name=name, email=email)
+
 
 model_remap = {
     'campaign': 'campaign_id',
@@ -51,9 +90,22 @@ class Transmissions(Resource):
     """
 
     key = 'transmissions'
+    # Attachments given by filename and at least this many bytes long are
+    # base64 encoded while the request is sent. None disables streaming.
+    attachment_stream_threshold = 1024 * 1024
+    # Optional sparkpost.cache.AttachmentCache for files sent repeatedly
+    attachment_cache = None
+    # Optional sparkpost.idempotency.IdempotencyStore to suppress duplicates
+    idempotency_store = None
 
     def _translate_keys(self, **kwargs):
-        model = copy.deepcopy(kwargs)
+        # kwargs is already a new dict. Rather than deep copying it, only the
+        # containers modified below are copied, so caller data is left as is
+        # and large values (recipients, attachments...) are never duplicated.
+        model = kwargs
+        for key in ('content', 'options', 'recipients'):
+            if isinstance(model.get(key), dict):
+                model[key] = dict(model[key])
 
         # Intersection of keys that need to be remapped
         data_remap_keys = model_remap_keys.intersection(model.keys())
@@ -112,8 +164,7 @@ class Transmissions(Resource):
 
             cc = model.pop('cc', None)
             if cc:
-                headers = content.setdefault('headers', {})
-                headers['CC'] = ','.join(cc)
+                self._add_cc_header(content, cc)
                 cc_copies = self._format_copies(recipients, cc)
                 recipients.extend(cc_copies)
 
@@ -124,26 +175,28 @@ class Transmissions(Resource):
 
         return model
 
+    def _add_cc_header(self, content, cc):
+        headers = dict(content.get('headers') or {})
+        headers['CC'] = ','.join(cc)
+        content['headers'] = headers
+
     def _format_copies(self, recipients, copies):
         formatted_copies = []
         if len(recipients) > 0:
-            formatted_copies = self._extract_recipients(copies)
-            main_recipient = copy.deepcopy(recipients[0])
+            main_recipient = dict(recipients[0])
             main_recipient.pop('address')
-            for recipient in formatted_copies:
-                recipient['address'].update({
-                    'header_to': self._format_header_to(recipients[0])
-                })
-                recipient.update(**main_recipient)
+            header_to = self._format_header_to(recipients[0])
+            for recipient in self._extract_recipients(copies):
+                formatted_copy = dict(recipient)
+                formatted_copy['address'] = dict(recipient['address'],
+                                                 header_to=header_to)
+                formatted_copy.update(main_recipient)
+                formatted_copies.append(formatted_copy)
         return formatted_copies
 
     def _format_header_to(self, recipient):
-        if 'name' in recipient['address']:
-            return '"{name}" <{email}>'.format(
-                name=recipient['address']['name'],
-                email=recipient['address']['email']
-            )
-        return recipient['address']['email']
+        address = recipient['address']
+        return format_header_to(address['email'], address.get('name'))
 
     def _extract_attachments(self, attachments):
         formatted_attachments = []
@@ -152,20 +205,45 @@ class Transmissions(Resource):
             formatted_attachment['type'] = attachment.get('type')
             formatted_attachment['name'] = attachment.get('name')
             if 'filename' in attachment:
-                formatted_attachment['data'] = self._get_base64_from_file(
+                formatted_attachment['data'] = self._encode_file(
                     attachment['filename'])
             else:
                 formatted_attachment['data'] = attachment.get('data')
             formatted_attachments.append(formatted_attachment)
         return formatted_attachments
 
+    def _encode_file(self, filename):
+        if self.attachment_cache is not None:
+            encoded = self.attachment_cache.get(filename,
+                                                self._get_base64_from_file)
+            if encoded is not None:
+                return encoded
+        threshold = self.attachment_stream_threshold
+        if threshold is not None and os.path.getsize(filename) >= threshold:
+            return Base64File(filename)
+        return self._get_base64_from_file(filename)
+
+    def _streamed_files(self, payload):
+        content = payload.get('content', {})
+        return [attachment
+                for key in ('attachments', 'inline_images')
+                for attachment in content.get(key) or ()
+                if isinstance(attachment.get('data'), Base64File)]
+
+    def _serialize(self, payload):
+        with self.tracer.span('sparkpost.serialize'):
+            files = self._streamed_files(payload)
+            if files:
+                return StreamingBody.from_payload(payload, self.codec, files)
+            return self.codec.dumps(payload)
+
     def _get_base64_from_file(self, filename):
         with open(filename, "rb") as a_file:
             encoded_string = base64.b64encode(a_file.read()).decode("ascii")
         return encoded_string
 
     def _parse_address(self, address):
-        name, email = parseaddr(address)
+        name, email = parse_address(address)
         parsed_address = {
             'email': email
         }
@@ -179,13 +257,17 @@ class Transmissions(Resource):
             raise SparkPostException('recipients must be a list or dict')
 
         formatted_recipients = []
+        append = formatted_recipients.append
+        is_plain = plain_address.match
         for recip in recipients:
             if isinstance(recip, string_types):
-                formatted_recipients.append({
-                    'address': self._parse_address(recip)
-                })
+                if is_plain(recip):
+                    # Fast path for the common bare email address
+                    append({'address': {'email': recip}})
+                else:
+                    append({'address': self._parse_address(recip)})
             else:
-                formatted_recipients.append(recip)
+                append(recip)
         return formatted_recipients
 
     def send(self, **kwargs):
@@ -288,17 +370,173 @@ class Transmissions(Resource):
         :param dict custom_headers: Used to set any headers associated with
             transmission. See `header notes
             <https://developers.sparkpost.com/api/transmissions.html#header-header-notes>`_
+        :param str idempotency_key: Identifies this transmission across
+            retries. Stored in ``metadata`` and, with an
+            :attr:`idempotency_store`, used to return the first result instead
+            of sending again. ``True`` derives the key from the content,
+            which is the default with a store; ``False`` sends regardless
 
         :returns: a ``dict`` with the transmission ID and number of accepted
             and rejected recipients
         :raises: :exc:`SparkPostAPIException` if transmission cannot be sent
         """
-
-        payload = self._translate_keys(**kwargs)
-        data = json.dumps(payload)
-        results = self.request('POST', self.uri, data=data)
+        key = kwargs.pop('idempotency_key', None)
+        with self.tracer.span('sparkpost.build_payload'):
+            payload = self._translate_keys(**kwargs)
+        store = self.idempotency_store
+        if key is True or (key is None and store is not None):
+            key = payload_key(payload)
+        if not key:
+            return self.request('POST', self.uri,
+                                data=self._serialize(payload))
+
+        metadata = dict(payload.get('metadata') or {})
+        metadata[METADATA_KEY] = key
+        payload['metadata'] = metadata
+        data = self._serialize(payload)
+        if store is None:
+            return self.request('POST', self.uri, data=data)
+        return self._send_once(store, key, data)
+
+    def _send_once(self, store, key, data):
+        """
+        Send ``data`` unless ``store`` already holds a result for ``key``.
+        Asynchronous clients override it, as they cannot block on the store
+        """
+        results = store.begin(key)
+        if results is not None:
+            return results
+        try:
+            results = self.request('POST', self.uri, data=data)
+        except Exception:
+            store.finish(key, sent=False)
+            raise
+        store.finish(key, results)
         return results
 
+    def send_chunked(self, chunk_size=10000, concurrency=4, **kwargs):
+        """
+        Send a transmission whose recipient list is split into several API
+        requests of at most ``chunk_size`` recipients, sent concurrently.
+        Content and options are translated and serialized once and shared by
+        every chunk. cc and bcc copies are expanded before splitting; each
+        copy carries its own ``header_to`` and is valid in any chunk.
+        With an idempotency key, chunk ``n`` is sent under ``'<key>-<n>'``.
+
+        Accepts the same parameters as :meth:`send`, plus:
+
+        :param int chunk_size: Maximum number of recipients per request
+        :param int concurrency: Maximum number of chunks in flight
+
+        :returns: a ``dict`` with the summed ``total_accepted_recipients`` and
+            ``total_rejected_recipients``, the ``id`` of the first chunk and
+            the ``ids`` of all chunks
+        :raises: :exc:`SparkPostChunkedSendException` if any chunk fails,
+            after the remaining chunks have been sent
+        """
+        from .bulk import dispatch
+        chunks, send_chunk = self._chunks(chunk_size, kwargs)
+        return _merge_chunks(
+            (index, result, error) for index, _, result, error in
+            dispatch(lambda item: send_chunk(*item), enumerate(chunks),
+                     concurrency))
+
+    def _chunks(self, chunk_size, kwargs):
+        """
+        Translate the parameters of :meth:`send_chunked` and split their
+        recipients. Returns the chunks and a ``send_chunk(index, chunk)``
+        function.
+
+        With an idempotency key, given or derived as by :meth:`send`, chunk
+        ``index`` is sent under the key ``'<key>-<index>'``, so that the
+        chunks that were accepted are not sent again on a retry
+        """
+        if chunk_size < 1:
+            raise SparkPostException('chunk_size must be at least 1')
+        key = kwargs.pop('idempotency_key', None)
+        with self.tracer.span('sparkpost.build_payload'):
+            payload = self._translate_keys(**kwargs)
+        store = self.idempotency_store
+        if key is True or (key is None and store is not None):
+            key = payload_key(payload)
+        recipients = payload.pop('recipients')
+        if isinstance(recipients, dict):
+            chunks = [recipients]
+        else:
+            chunks = [recipients[i:i + chunk_size]
+                      for i in range(0, len(recipients), chunk_size)] or [[]]
+        metadata = payload.pop('metadata', None)
+        build_body = self._body_builder(payload, 'recipients', 'metadata')
+
+        def send_chunk(index, chunk):
+            if not key:
+                return self.request('POST', self.uri,
+                                    data=build_body(chunk, metadata))
+            chunk_key = '%s-%d' % (key, index)
+            chunk_metadata = dict(metadata or {})
+            chunk_metadata[METADATA_KEY] = chunk_key
+            data = build_body(chunk, chunk_metadata)
+            if store is None:
+                return self.request('POST', self.uri, data=data)
+            return self._send_once(store, chunk_key, data)
+        return chunks, send_chunk
+
+    def _body_builder(self, payload, *keys):
+        """
+        Serialize ``payload`` once and return a function that builds the full
+        JSON body from values for ``keys``, without re-serializing the rest
+        of the payload. Keys whose value is ``None`` are left out. Streamed
+        attachments are encoded here, once.
+        """
+        for attachment in self._streamed_files(payload):
+            attachment['data'] = attachment['data'].encode()
+        dumps = self.codec.dumps
+        head = dumps(payload)[:-1]
+        names = [dumps(key) + ': ' for key in keys]
+
+        def build_body(*values):
+            parts = [head]
+            separator = ', ' if payload else ''
+            for name, value in zip(names, values):
+                if value is not None:
+                    parts.extend((separator, name, dumps(value)))
+                    separator = ', '
+            parts.append('}')
+            return ''.join(parts)
+        return build_body
+
+    def prepare(self, **kwargs):
+        """
+        Translate and serialize the parameters shared by many sends once.
+        Accepts the same parameters as :meth:`send`, except ``recipients``,
+        given as a list to each send, ``recipient_list``, which prototypes do
+        not support, and ``idempotency_key``: sends of a prototype bypass
+        :attr:`idempotency_store`.
+
+        :returns: a :class:`TransmissionPrototype` whose ``send(recipients,
+            substitution_data=None)`` only serializes what varies
+        """
+        return TransmissionPrototype(self, **kwargs)
+
+    def send_many(self, transmissions, concurrency=8):
+        """
+        Send many transmissions concurrently over the client's connection
+        pool. Nothing is sent until the returned object is iterated.
+
+        :param transmissions: Iterable of ``dict``, each holding the keyword
+            arguments for one :meth:`send` call. It is consumed lazily
+        :param int concurrency: Maximum number of requests in flight. Keep it
+            at or below the transport's ``pool_maxsize`` so every request
+            reuses a pooled connection
+
+        :returns: a :class:`~sparkpost.bulk.BulkSend` yielding one
+            ``SendResult(index, kwargs, result, error)`` per transmission, in
+            input order. Failures are reported in ``error`` rather than
+            raised. Its ``stats`` hold counts, elapsed time and throughput
+        """
+        from .bulk import BulkSend
+        return BulkSend(self.send, transmissions, concurrency)
+
     def _fetch_get(self, transmission_id):
         uri = "%s/%s" % (self.uri, transmission_id)
         results = self.request('GET', uri)
@@ -344,3 +582,90 @@ class Transmissions(Resource):
         uri = "%s/%s" % (self.uri, transmission_id)
         results = self.request('DELETE', uri)
         return results
+
+
+def _merge_chunks(outcomes):
+    """
+    Merge the ``(index, result, error)`` outcomes of the chunks of
+    :meth:`Transmissions.send_chunked`, raising
+    :exc:`SparkPostChunkedSendException` if any failed
+    """
+    merged = {
+        'total_accepted_recipients': 0,
+        'total_rejected_recipients': 0,
+        'id': None,
+        'ids': [],
+    }
+    errors = []
+    for index, result, error in outcomes:
+        if error is not None:
+            errors.append((index, error))
+            continue
+        merged['ids'].append(result.get('id'))
+        for key in ('total_accepted_recipients',
+                    'total_rejected_recipients'):
+            merged[key] += result.get(key, 0)
+    if merged['ids']:
+        merged['id'] = merged['ids'][0]
+    if errors:
+        raise SparkPostChunkedSendException(merged, errors)
+    return merged
+
+
+class TransmissionPrototype(object):
+    """
+    Transmission prepared by :meth:`Transmissions.prepare`. Content, options,
+    campaign and the rest are translated and serialized when the prototype
+    is built; each :meth:`send` splices in the recipients (with their cc and
+    bcc copies) and the substitution data. Sends are not checked against
+    :attr:`Transmissions.idempotency_store`.
+    """
+
+    def __init__(self, transmissions, **kwargs):
+        if 'recipients' in kwargs or 'recipient_list' in kwargs:
+            raise SparkPostException(
+                'recipients are passed to send(), not to prepare()')
+        if 'idempotency_key' in kwargs:
+            raise SparkPostException(
+                'idempotency_key is not supported by prepare()')
+        self.transmissions = transmissions
+        self.cc = kwargs.pop('cc', None)
+        self.bcc = kwargs.pop('bcc', None)
+        self.substitution_data = kwargs.pop('substitution_data', None)
+        payload = transmissions._translate_keys(**kwargs)
+        del payload['recipients']
+        if self.cc:
+            transmissions._add_cc_header(payload['content'], self.cc)
+        self._build_body = transmissions._body_builder(
+            payload, 'recipients', 'substitution_data')
+
+    def send(self, recipients, substitution_data=None):
+        """
+        Send the prepared transmission
+
+        :param list recipients: Email addresses or recipient dicts, as for
+            :meth:`Transmissions.send`. Recipient lists are not supported
+        :param dict substitution_data: Replaces the substitution data given
+            to :meth:`Transmissions.prepare`, if any
+
+        :returns: a ``dict`` with the transmission ID and number of accepted
+            and rejected recipients
+        :raises: :exc:`SparkPostAPIException` if transmission cannot be sent
+        """
+        if not isinstance(recipients, list):
+            raise SparkPostException('recipients must be a list')
+        transmissions = self.transmissions
+        tracer = transmissions.tracer
+        with tracer.span('sparkpost.build_payload'):
+            recipients = transmissions._extract_recipients(recipients)
+            if self.cc:
+                recipients.extend(
+                    transmissions._format_copies(recipients, self.cc))
+            if self.bcc:
+                recipients.extend(
+                    transmissions._format_copies(recipients, self.bcc))
+        if substitution_data is None:
+            substitution_data = self.substitution_data
+        with tracer.span('sparkpost.serialize'):
+            data = self._build_body(recipients, substitution_data)
+        return transmissions.request('POST', transmissions.uri, data=data)
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import zlib
+
+import mock
+import pytest
+
+from sparkpost import SparkPost as SyncSparkPost
+from sparkpost.aio import AiohttpTransport, SparkPost, SparkPostAPIException
+from sparkpost.compression import GzipCompression
+from sparkpost.exceptions import SparkPostChunkedSendException
+from sparkpost.idempotency import IdempotencyStore
+from sparkpost.ratelimit import RateLimiter, TokenBucket
+from sparkpost.retry import RetryPolicy
+from .utils import FakeSession, run
+
+BASE = 'https://api.sparkpost.com/api/v1'
+
+
+def create_client(**transport_kwargs):
+    session = FakeSession()
+    transport = AiohttpTransport(**transport_kwargs)
+    transport._session = session
+    return SparkPost('fake-key', transport=transport), session
+
+
+def test_success_send():
+    sp, session = create_client()
+    session.add('POST', BASE + '/transmissions',
+                body='{"results": {"total_accepted_recipients": 1}}')
+    results = run(sp.transmissions.send(recipients=['to@example.com'],
+                                        cc=['cc@example.com'],
+                                        from_email='Me <me@example.com>',
+                                        text='hello'))
+    assert results == {'total_accepted_recipients': 1}
+
+    sync_payload = SyncSparkPost('fake-key').transmissions._translate_keys(
+        recipients=['to@example.com'], cc=['cc@example.com'],
+        from_email='Me <me@example.com>', text='hello')
+    assert json.loads(session.calls[0].kwargs['data']) == sync_payload
+    assert session.calls[0].headers['Authorization'] == 'fake-key'
+
+
+def test_fail_send():
+    sp, session = create_client()
+    session.add('POST', BASE + '/transmissions', status=500,
+                body='{"errors": [{"message": "failed", "description": "x"}]}')
+    with pytest.raises(SparkPostAPIException) as exc:
+        run(sp.transmissions.send(text='hello'))
+    assert exc.value.status == 500
+    assert exc.value.errors == ['failed: x']
+
+
+def test_fail_send_unexpected_body():
+    sp, session = create_client()
+    session.add('POST', BASE + '/transmissions', status=502,
+                body='<html>Bad Gateway</html>')
+    session.add('POST', BASE + '/transmissions', status=500,
+                body='{"errors": "failed"}')
+    with pytest.raises(SparkPostAPIException) as exc:
+        run(sp.transmissions.send(text='hello'))
+    assert exc.value.errors == ['<html>Bad Gateway</html>']
+    with pytest.raises(SparkPostAPIException) as exc:
+        run(sp.transmissions.send(text='hello'))
+    assert exc.value.errors == ['{"errors": "failed"}']
+
+
+def test_success_get_transmission():
+    sp, session = create_client()
+    session.add('GET', BASE + '/transmissions/foobar',
+                body='{"results": {"transmission": {"id": "foobar"}}}')
+    results = run(sp.transmissions.get('foobar'))
+    assert results == {'id': 'foobar'}
+
+
+def test_nocontent():
+    sp, session = create_client()
+    session.add('DELETE', BASE + '/templates/foobar', status=204)
+    assert run(sp.templates.delete('foobar')) is True
+
+
+def test_brokenjson():
+    sp, session = create_client()
+    session.add('GET', BASE + '/templates', body='{"results":')
+    with pytest.raises(SparkPostAPIException):
+        run(sp.templates.list())
+
+
+def test_template_get_params():
+    sp, session = create_client()
+    session.add('GET', BASE + '/templates/foobar', body='{"results": {}}')
+    run(sp.templates.get('foobar', draft=True))
+    assert session.calls[0].kwargs['params'] == [('draft', 'true')]
+
+
+def test_suppression_list_params():
+    sp, session = create_client()
+    session.add('GET', BASE + '/suppression-list', body='{"results": []}')
+    run(sp.suppression_list.list(types=['a', 'b'], limit=10))
+    assert sorted(session.calls[0].kwargs['params']) == [
+        ('limit', 10), ('types', 'a'), ('types', 'b')]
+
+
+def test_recipient_lists_create():
+    sp, session = create_client()
+    session.add('POST', BASE + '/recipient-lists', body='{"results": "yay"}')
+    assert run(sp.recipient_lists.create(id='list', name='List')) == 'yay'
+
+
+def test_metrics():
+    sp, session = create_client()
+    session.add('GET', BASE + '/metrics/campaigns',
+                body='{"results": {"campaigns": ["c"]}}')
+    session.add('GET', BASE + '/metrics/domains',
+                body='{"results": {"domains": ["d"]}}')
+    assert run(sp.metrics.campaigns.list()) == ['c']
+    assert run(sp.metrics.domains.list()) == ['d']
+
+
+def test_resources_share_transport():
+    sp, _ = create_client()
+    assert sp.templates.transport is sp.transport
+    assert sp.metrics.campaigns.transport is sp.transport
+
+
+def test_context_manager_closes_session():
+    sp, session = create_client()
+
+    async def use_client():
+        async with sp as client:
+            assert client is sp
+    run(use_client())
+    assert session.closed
+    assert sp.transport._session is None
+
+
+def test_retry():
+    retry = RetryPolicy(backoff_factor=0)
+    sp, session = create_client(retry=retry)
+    session.add('GET', BASE + '/templates', status=429,
+                headers={'Retry-After': '0'})
+    session.add('GET', BASE + '/templates', body='{"results": []}')
+    assert run(sp.templates.list()) == []
+    assert len(session.calls) == 2
+    assert retry.stats == {'retries': 1, 'give_ups': 0}
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(per_resource={'templates': TokenBucket(1000)})
+    limiter.reserve = mock.Mock(wraps=limiter.reserve)
+    sp, session = create_client(rate_limiter=limiter)
+    session.add('GET', BASE + '/templates', body='{"results": []}')
+    run(sp.templates.list())
+    limiter.reserve.assert_called_once_with(BASE + '/templates')
+
+
+def test_rate_limiter_paces_tasks():
+    limiter = RateLimiter(default=TokenBucket(rate=100, capacity=1))
+
+    async def task():
+        await asyncio.sleep(limiter.reserve('uri'))
+        return asyncio.get_event_loop().time()
+
+    async def main():
+        start = asyncio.get_event_loop().time()
+        finished = await asyncio.gather(*[task() for _ in range(5)])
+        return max(finished) - start
+
+    assert run(main()) >= 0.035
+
+
+def test_compression():
+    sp, session = create_client(compression=GzipCompression(threshold=10))
+    session.add('POST', BASE + '/transmissions', body='{"results": {}}')
+    run(sp.transmissions.send(recipients=['to@example.com'],
+                              text='hello ' * 100))
+    assert session.calls[0].headers['Content-Encoding'] == 'gzip'
+    body = zlib.decompress(session.calls[0].kwargs['data'],
+                           16 + zlib.MAX_WBITS)
+    assert json.loads(body.decode('utf-8'))['content']['text'].startswith(
+        'hello')
+
+
+def test_hooks():
+    sp, session = create_client()
+    session.add('GET', BASE + '/templates/abc',
+                body='{"results": {"id": "abc"}}')
+    session.add('GET', BASE + '/templates', status=500, body='{}')
+    contexts = []
+    sp.hooks.register('post_response', contexts.append)
+    sp.hooks.register('on_error', contexts.append)
+    run(sp.templates.get('abc'))
+    with pytest.raises(SparkPostAPIException):
+        run(sp.templates.list())
+
+    assert [c.uri_template for c in contexts] == ['templates/{id}',
+                                                  'templates']
+    assert contexts[0].status == 200
+    assert contexts[0].result == {'id': 'abc'}
+    assert contexts[0].ttfb is not None
+    assert contexts[1].status == 500
+    assert isinstance(contexts[1].error, SparkPostAPIException)
+
+
+def test_tracer():
+    tracer = mock.Mock(enabled=True)
+    session = FakeSession()
+    transport = AiohttpTransport()
+    transport._session = session
+    sp = SparkPost('fake-key', transport=transport, tracer=tracer)
+    session.add('GET', BASE + '/templates', body='{"results": []}')
+    run(sp.templates.list())
+    tracer.start_span.assert_called_once()
+    assert [c[0][1] for c in tracer.add_phase.call_args_list] == [
+        'network', 'decode']
+    tracer.end_span.assert_called_once_with(tracer.start_span.return_value,
+                                            None)
+
+
+def test_send_many():
+    sp, session = create_client()
+    session.add('POST', BASE + '/transmissions',
+                body='{"results": {"id": "1"}}')
+    session.add('POST', BASE + '/transmissions', status=400,
+                body='{"errors": [{"message": "invalid"}]}')
+    session.add('POST', BASE + '/transmissions',
+                body='{"results": {"id": "3"}}')
+    transmissions = [{'recipients': ['to%d@example.com' % i], 'text': 'hi'}
+                     for i in range(3)]
+    results = run(sp.transmissions.send_many(transmissions, concurrency=2))
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].result == {'id': '1'}
+    assert isinstance(results[1].error, SparkPostAPIException)
+    assert results[2].kwargs == transmissions[2]
+    assert results[2].result == {'id': '3'}
+    assert (results.stats['sent'], results.stats['failed']) == (2, 1)
+
+
+def test_send_many_concurrency():
+    sp, _ = create_client()
+    state = {'in_flight': 0, 'max': 0, 'pulled': 0, 'max_ahead': 0}
+
+    def transmissions():
+        for i in range(10):
+            state['pulled'] += 1
+            yield {'text': str(i)}
+
+    async def send(**kwargs):
+        # Inputs are pulled as workers free up, not all up front
+        state['max_ahead'] = max(state['max_ahead'],
+                                 state['pulled'] - int(kwargs['text']))
+        state['in_flight'] += 1
+        state['max'] = max(state['max'], state['in_flight'])
+        await asyncio.sleep(0)
+        state['in_flight'] -= 1
+        return kwargs
+
+    with mock.patch.object(sp.transmissions, 'send', send):
+        results = run(sp.transmissions.send_many(transmissions(),
+                                                 concurrency=3))
+    assert [r.result['text'] for r in results] == [str(i) for i in range(10)]
+    assert state['max'] == 3
+    assert state['max_ahead'] <= 3
+
+
+def test_send_chunked():
+    sp, session = create_client()
+    for index in range(3):
+        session.add('POST', BASE + '/transmissions',
+                    body='{"results": {"id": "%d", '
+                         '"total_accepted_recipients": 2}}' % index)
+    recipients = ['to%d@example.com' % i for i in range(5)]
+    results = run(sp.transmissions.send_chunked(
+        chunk_size=2, recipients=recipients, subject='chunks', text='hi'))
+    assert results['total_accepted_recipients'] == 6
+    assert sorted(results['ids']) == ['0', '1', '2']
+    bodies = [json.loads(call.kwargs['data']) for call in session.calls]
+    assert sorted(r['address']['email']
+                  for body in bodies for r in body['recipients']) == recipients
+    assert all(body['content']['subject'] == 'chunks' for body in bodies)
+
+
+def test_send_chunked_partial_failure():
+    sp, session = create_client()
+    session.add('POST', BASE + '/transmissions',
+                body='{"results": {"id": "1"}}')
+    session.add('POST', BASE + '/transmissions', status=500,
+                body='{"errors": [{"message": "failed"}]}')
+    with pytest.raises(SparkPostChunkedSendException) as exc:
+        run(sp.transmissions.send_chunked(
+            chunk_size=1, concurrency=1,
+            recipients=['a@example.com', 'b@example.com']))
+    assert exc.value.result['ids'] == ['1']
+    assert [index for index, _ in exc.value.errors] == [1]
+    assert isinstance(exc.value.errors[0][1], SparkPostAPIException)
+
+
+def test_idempotency_store():
+    sp, session = create_client()
+    sp.transmissions.idempotency_store = IdempotencyStore()
+    session.add('POST', BASE + '/transmissions', status=500,
+                body='{"errors": [{"message": "failed"}]}')
+    session.add('POST', BASE + '/transmissions',
+                body='{"results": {"id": "1"}}')
+    with pytest.raises(SparkPostAPIException):
+        run(sp.transmissions.send(recipients=['to@example.com'], text='hi'))
+
+    async def send_twice():
+        return await asyncio.gather(*[
+            sp.transmissions.send(recipients=['to@example.com'], text='hi')
+            for _ in range(2)])
+    assert run(send_twice()) == [{'id': '1'}, {'id': '1'}]
+    assert len(session.calls) == 2
+    assert sp.transmissions.idempotency_store.stats['hits'] == 1
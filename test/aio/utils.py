@@ -0,0 +1,58 @@
+import asyncio
+from collections import namedtuple
+
+Call = namedtuple("Call", ["method", "url", "headers", "kwargs"])
+
+
+class FakeResponse(object):
+    def __init__(self, url, status, body, headers=None):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self._body = body.encode("utf-8")
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class FakeSession(object):
+    """Stands in for ``aiohttp.ClientSession`` and records every request"""
+
+    closed = False
+
+    def __init__(self):
+        self.registered = {}
+        self.calls = []
+
+    def add(self, method, url, status=200, body='', headers=None):
+        """
+        Register a response. Several responses for the same request are
+        returned in order, the last one repeating.
+        """
+        self.registered.setdefault((method, url), []).append(
+            (status, body, headers))
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.calls.append(Call(method, url, headers, kwargs))
+        registered = self.registered[(method, url)]
+        status, body, response_headers = registered[0]
+        if len(registered) > 1:
+            registered.pop(0)
+        return FakeResponse(url, status, body, response_headers)
+
+    async def close(self):
+        self.closed = True
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
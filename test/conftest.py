@@ -0,0 +1,11 @@
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('aio')
+else:
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        # aiohttp is only in dev-requirements.txt
+        collect_ignore.append('aio')
@@ -8,8 +8,12 @@ from django.core.mail import EmailMultiAlternatives
 from django.utils.functional import empty
 
 from sparkpost import EU_API, US_API
-from sparkpost.django.email_backend import SparkPostEmailBackend
+from sparkpost.django.email_backend import (
+    SparkPostEmailBackend, SparkPostQueuedEmailBackend, close_clients,
+    close_outbox, get_client, get_outbox)
 from sparkpost.django.exceptions import UnsupportedContent
+from sparkpost.exceptions import SparkPostException
+from sparkpost.outbox import MemoryOutbox, Outbox
 from sparkpost.transmissions import Transmissions
 
 API_KEY = 'API_Key'
@@ -236,3 +240,215 @@ def test_settings_options():
         del expected_kargs["recipient_list"]
         expected_kargs.update(SPARKPOST_OPTIONS)
         Transmissions.send.assert_called_with(**expected_kargs)
+
+
+def accept_all(**kwargs):
+    return {'total_accepted_recipients': len(kwargs['recipients']),
+            'total_rejected_recipients': 0}
+
+
+def test_groups_identical_messages():
+    messages = [('subject', 'body', 'from@example.com',
+                 ['to%d@example.com' % i]) for i in range(5)]
+    messages.append(('other subject', 'body', 'from@example.com',
+                     ['to0@example.com']))
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = accept_all
+        assert send_mass_mail(messages) == 6
+        assert mock_send.call_count == 2
+        recipients = sorted(call[1]['recipients']
+                            for call in mock_send.call_args_list)
+        assert recipients == [
+            ['to0@example.com'],
+            ['to%d@example.com' % i for i in range(5)]]
+
+
+def test_does_not_group_cc_or_repeated_recipients():
+    backend = SparkPostEmailBackend()
+    messages = [
+        EmailMultiAlternatives('subject', 'body', 'from@example.com',
+                               ['to1@example.com'], cc=['cc@example.com']),
+        EmailMultiAlternatives('subject', 'body', 'from@example.com',
+                               ['to1@example.com'], cc=['cc@example.com']),
+        EmailMultiAlternatives('subject', 'body', 'from@example.com',
+                               ['to1@example.com']),
+        EmailMultiAlternatives('subject', 'body', 'from@example.com',
+                               ['to1@example.com']),
+    ]
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = accept_all
+        assert backend.send_messages(messages) == 4
+        assert mock_send.call_count == 4
+
+
+def test_batch_size():
+    reconfigure_settings(SPARKPOST_BATCH_SIZE=2)
+    try:
+        messages = [('subject', 'body', 'from@example.com',
+                     ['to%d@example.com' % i]) for i in range(5)]
+        with mock.patch.object(Transmissions, 'send') as mock_send:
+            mock_send.side_effect = accept_all
+            assert send_mass_mail(messages) == 5
+            assert sorted(len(call[1]['recipients'])
+                          for call in mock_send.call_args_list) == [1, 2, 2]
+    finally:
+        reconfigure_settings(SPARKPOST_BATCH_SIZE=1000)
+
+
+def test_concurrent_send_fail_silently():
+    def send(**kwargs):
+        if kwargs['subject'] == 'subject 1':
+            raise Exception('failed')
+        return accept_all(**kwargs)
+
+    messages = [('subject %d' % i, 'body', 'from@example.com',
+                 ['to@example.com']) for i in range(4)]
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = send
+        assert send_mass_mail(messages, fail_silently=True) == 3
+        with pytest.raises(Exception):
+            send_mass_mail(messages)
+
+
+def test_max_concurrency_setting():
+    reconfigure_settings(SPARKPOST_MAX_CONCURRENCY=20)
+    close_clients()
+    try:
+        backend = SparkPostEmailBackend()
+        assert backend.max_concurrency == 20
+        assert backend.client.transport.pool_maxsize == 20
+    finally:
+        reconfigure_settings(SPARKPOST_MAX_CONCURRENCY=8)
+
+    reconfigure_settings(SPARKPOST_MAX_CONCURRENCY=0)
+    try:
+        with pytest.raises(ValueError):
+            SparkPostEmailBackend()
+    finally:
+        reconfigure_settings(SPARKPOST_MAX_CONCURRENCY=8)
+
+
+def test_errors_do_not_abort_batch():
+    def send(**kwargs):
+        if kwargs['subject'] in ('subject 1', 'subject 2'):
+            raise Exception(kwargs['subject'])
+        return accept_all(**kwargs)
+
+    backend = SparkPostEmailBackend()
+    messages = [EmailMultiAlternatives('subject %d' % i, 'body',
+                                       'from@example.com', ['to@example.com'])
+                for i in range(5)]
+    unsupported = EmailMultiAlternatives('subject', 'body',
+                                         'from@example.com',
+                                         ['to@example.com'])
+    unsupported.attach_alternative('content', 'text/alien')
+    messages.append(unsupported)
+
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = send
+        with pytest.raises(UnsupportedContent):
+            backend.send_messages(messages)
+        # Everything was tried before raising
+        assert mock_send.call_count == 5
+    assert [message for message, _ in backend.errors] == [
+        unsupported, messages[1], messages[2]]
+    assert [str(error) for _, error in backend.errors[1:]] == [
+        'subject 1', 'subject 2']
+
+    backend.fail_silently = True
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = send
+        assert backend.send_messages(messages) == 3
+    assert len(backend.errors) == 3
+
+
+def test_queued_backend():
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = accept_all
+        backend = SparkPostQueuedEmailBackend()
+        try:
+            assert isinstance(backend.outbox, MemoryOutbox)
+            assert backend.outbox is get_outbox()
+            messages = [EmailMultiAlternatives(
+                'subject', 'body', 'from@example.com',
+                ['to%d@example.com' % i], cc=['cc@example.com'])
+                for i in range(3)]
+            assert backend.send_messages(messages) == 6
+            backend.outbox.flush()
+            assert mock_send.call_count == 3
+            assert mock_send.call_args[1]['idempotency_key']
+            assert backend.outbox.stats['sent'] == 3
+        finally:
+            close_outbox()
+    assert get_outbox() is not backend.outbox
+    close_outbox()
+
+
+def test_queued_backend_on_disk(tmpdir):
+    reconfigure_settings(SPARKPOST_QUEUE_PATH=str(tmpdir.join('outbox.db')))
+    try:
+        with mock.patch.object(Transmissions, 'send') as mock_send:
+            mock_send.side_effect = accept_all
+            backend = SparkPostQueuedEmailBackend()
+            assert isinstance(backend.outbox, Outbox)
+            assert mailer(get_params({'connection': backend})) == 1
+            backend.outbox.flush()
+            assert mock_send.call_count == 1
+    finally:
+        close_outbox()
+        reconfigure_settings(SPARKPOST_QUEUE_PATH=None)
+
+
+def test_queued_backend_full_queue():
+    reconfigure_settings(SPARKPOST_QUEUE_SIZE=1)
+    try:
+        backend = SparkPostQueuedEmailBackend()
+        # Keep the message queued
+        backend.outbox.stop()
+        mailer(get_params({'connection': backend}))
+        with pytest.raises(SparkPostException):
+            mailer(get_params({'connection': backend}))
+        backend.fail_silently = True
+        assert mailer(get_params({'connection': backend})) == 0
+        assert len(backend.errors) == 1
+    finally:
+        close_outbox()
+        reconfigure_settings(SPARKPOST_QUEUE_SIZE=10000)
+
+
+def test_backends_share_client():
+    backend = SparkPostEmailBackend()
+    other = SparkPostEmailBackend()
+    assert backend.client is other.client
+    assert backend.client is get_client(API_KEY, settings.SPARKPOST_BASE_URI)
+    assert get_client('other key') is not backend.client
+
+    # Closing a backend keeps the connections open for the next one
+    with SparkPostEmailBackend() as connection:
+        assert connection.client is backend.client
+    assert SparkPostEmailBackend().client is backend.client
+
+    with mock.patch.object(backend.client.transport, 'close') as close:
+        close_clients()
+        assert close.call_count == 1
+    assert SparkPostEmailBackend().client is not backend.client
+
+
+def test_forked_process_gets_new_client():
+    client = SparkPostEmailBackend().client
+    with mock.patch('os.getpid', return_value=-1):
+        assert SparkPostEmailBackend().client is not client
+
+
+def test_settings_read_once():
+    backend = SparkPostEmailBackend()
+    with mock.patch.object(Transmissions, 'send') as mock_send:
+        mock_send.side_effect = accept_all
+        reconfigure_settings(SPARKPOST_OPTIONS={'campaign': 'other'})
+        try:
+            mailer(get_params({'connection': backend}))
+            assert 'campaign' not in mock_send.call_args[1]
+            mailer(get_params())
+            assert mock_send.call_args[1]['campaign'] == 'other'
+        finally:
+            reconfigure_settings(SPARKPOST_OPTIONS={})
@@ -1,7 +1,15 @@
+import zlib
+
+import mock
 import pytest
+import requests
 import responses
 
-from sparkpost.base import Resource
+from sparkpost.base import RequestsTransport, Resource
+from sparkpost.codec import JSONCodec
+from sparkpost.compression import GzipCompression
+from sparkpost.ratelimit import RateLimiter
+from sparkpost.retry import RetryPolicy
 from sparkpost.exceptions import SparkPostAPIException
 
 
@@ -50,6 +58,38 @@ def test_success_request_with_results():
     assert results == []
 
 
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        self.loads_calls = 0
+        self.dumps_calls = 0
+
+    def dumps(self, obj):
+        self.dumps_calls += 1
+        return super(CountingCodec, self).dumps(obj)
+
+    def loads(self, data):
+        self.loads_calls += 1
+        return super(CountingCodec, self).loads(data)
+
+
+@responses.activate
+def test_response_decoded_once():
+    responses.add(
+        responses.GET,
+        fake_uri,
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": 1}}'
+    )
+    codec = CountingCodec()
+    resource = Resource(fake_base_uri, fake_api_key,
+                        transport=RequestsTransport(codec=codec))
+    resource.key = fake_resource_key
+    assert resource.codec is codec
+    assert resource.request('GET', resource.uri) == {'id': 1}
+    assert codec.loads_calls == 1
+
+
 @responses.activate
 def test_fail_request():
     responses.add(
@@ -106,6 +146,99 @@ def test_fail_no_errors():
         resource.request('GET', resource.uri)
 
 
+def test_transport_pool_options():
+    transport = RequestsTransport(pool_connections=2, pool_maxsize=20,
+                                  pool_block=True)
+    adapter = transport.sess.get_adapter(fake_uri)
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 20
+    assert adapter._pool_block is True
+
+
+def test_resource_uses_given_transport():
+    transport = RequestsTransport()
+    resource = Resource(fake_base_uri, fake_api_key, transport=transport)
+    assert resource.transport is transport
+
+
+def create_retrying_resource(**kwargs):
+    kwargs.setdefault('backoff_factor', 0)
+    retry = RetryPolicy(**kwargs)
+    resource = Resource(fake_base_uri, fake_api_key,
+                        transport=RequestsTransport(retry=retry))
+    resource.key = fake_resource_key
+    return resource, retry
+
+
+@responses.activate
+def test_retry_then_success():
+    responses.add(responses.GET, fake_uri, status=503, body='')
+    responses.add(responses.GET, fake_uri, status=200,
+                  content_type='application/json', body='{"results": 1}')
+    resource, retry = create_retrying_resource()
+    assert resource.request('GET', resource.uri) == 1
+    assert len(responses.calls) == 2
+    assert retry.stats == {'retries': 1, 'give_ups': 0}
+
+
+@responses.activate
+def test_retry_gives_up():
+    responses.add(responses.GET, fake_uri, status=503, body='')
+    resource, retry = create_retrying_resource(max_attempts=3)
+    with pytest.raises(SparkPostAPIException):
+        resource.request('GET', resource.uri)
+    assert len(responses.calls) == 3
+    assert retry.stats == {'retries': 2, 'give_ups': 1}
+
+
+@responses.activate
+def test_retry_skips_post():
+    responses.add(responses.POST, fake_uri, status=503, body='')
+    resource, retry = create_retrying_resource()
+    with pytest.raises(SparkPostAPIException):
+        resource.request('POST', resource.uri, data='{}')
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_retry_connection_error():
+    resource, retry = create_retrying_resource(max_attempts=2)
+    with pytest.raises(requests.ConnectionError):
+        resource.request('GET', resource.uri)
+    assert retry.stats == {'retries': 1, 'give_ups': 1}
+
+
+@responses.activate
+def test_rate_limiter_is_applied():
+    responses.add(responses.GET, fake_uri, status=503, body='')
+    responses.add(responses.GET, fake_uri, status=200,
+                  content_type='application/json', body='{}')
+    limiter = mock.Mock(spec=RateLimiter)
+    transport = RequestsTransport(rate_limiter=limiter,
+                                  retry=RetryPolicy(backoff_factor=0))
+    resource = Resource(fake_base_uri, fake_api_key, transport=transport)
+    resource.key = fake_resource_key
+    resource.request('GET', resource.uri)
+    assert limiter.acquire.call_args_list == [mock.call(fake_uri)] * 2
+
+
+@responses.activate
+def test_compression_is_applied():
+    responses.add(responses.POST, fake_uri, status=200,
+                  content_type='application/json', body='{}')
+    compression = GzipCompression(threshold=10)
+    transport = RequestsTransport(compression=compression)
+    resource = Resource(fake_base_uri, fake_api_key, transport=transport)
+    resource.key = fake_resource_key
+    body = '{"text": "%s"}' % ('hello ' * 100)
+    resource.request('POST', resource.uri, data=body)
+    request = responses.calls[0].request
+    assert request.headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(request.body, 16 + zlib.MAX_WBITS) == \
+        body.encode('utf-8')
+    assert compression.stats['requests'] == 1
+
+
 def test_fail_get():
     resource = create_resource()
     with pytest.raises(NotImplementedError):
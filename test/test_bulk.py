@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from sparkpost.bulk import dispatch
+
+
+def test_dispatch_keeps_input_order():
+    def func(item):
+        time.sleep(0.01 * (5 - item))
+        return item * 2
+
+    results = list(dispatch(func, range(5), concurrency=3))
+    assert [r[0] for r in results] == [0, 1, 2, 3, 4]
+    assert [r[2] for r in results] == [0, 2, 4, 6, 8]
+
+
+def test_dispatch_collects_errors():
+    def func(item):
+        if item == 1:
+            raise ValueError('boom')
+        return item
+
+    results = list(dispatch(func, range(3), concurrency=2))
+    assert results[0][2:] == (0, None)
+    assert results[1][2] is None
+    assert isinstance(results[1][3], ValueError)
+    assert results[2][2:] == (2, None)
+
+
+def test_dispatch_bounds_in_flight():
+    lock = threading.Lock()
+    state = {'current': 0, 'peak': 0}
+
+    def func(item):
+        with lock:
+            state['current'] += 1
+            state['peak'] = max(state['peak'], state['current'])
+        time.sleep(0.005)
+        with lock:
+            state['current'] -= 1
+
+    list(dispatch(func, range(20), concurrency=3))
+    assert state['peak'] <= 3
+
+
+def test_dispatch_consumes_lazily():
+    consumed = []
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    results = dispatch(lambda item: item, items(), concurrency=2)
+    next(results)
+    assert len(consumed) <= 3
+
+
+def test_dispatch_invalid_concurrency():
+    with pytest.raises(ValueError):
+        list(dispatch(lambda item: item, [1], concurrency=0))
@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+import pytest
+
+from sparkpost.cache import AttachmentCache
+
+
+@pytest.fixture
+def files():
+    paths = []
+    for content in (b'a' * 30, b'b' * 30, b'a' * 30, b'c' * 300):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as a_file:
+            a_file.write(content)
+        paths.append(path)
+    yield paths
+    for path in paths:
+        os.unlink(path)
+
+
+class Encoder(object):
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, filename):
+        self.calls.append(filename)
+        with open(filename, 'rb') as a_file:
+            return 'encoded:' + a_file.read().decode('ascii')
+
+
+def test_hit_and_miss(files):
+    cache = AttachmentCache()
+    encode = Encoder()
+    assert cache.get(files[0], encode) == 'encoded:' + 'a' * 30
+    assert cache.get(files[0], encode) == 'encoded:' + 'a' * 30
+    assert encode.calls == [files[0]]
+    assert cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0,
+                           'entries': 1, 'bytes': 38}
+
+
+def test_stat_key_notices_changes(files):
+    cache = AttachmentCache()
+    encode = Encoder()
+    cache.get(files[0], encode)
+    with open(files[0], 'wb') as a_file:
+        a_file.write(b'z' * 31)
+    assert cache.get(files[0], encode) == 'encoded:' + 'z' * 31
+    assert cache.misses == 2
+
+
+def test_hash_key_shares_identical_content(files):
+    cache = AttachmentCache(key='hash')
+    encode = Encoder()
+    cache.get(files[0], encode)
+    cache.get(files[2], encode)
+    assert encode.calls == [files[0]]
+    assert cache.hits == 1
+
+
+def test_lru_eviction(files):
+    cache = AttachmentCache(max_bytes=80)
+    encode = Encoder()
+    cache.get(files[0], encode)
+    cache.get(files[1], encode)
+    cache.get(files[0], encode)
+    cache.get(files[2], encode)
+    assert cache.evictions == 1
+    cache.get(files[0], encode)
+    assert cache.hits == 2
+    cache.get(files[1], encode)
+    assert cache.misses == 4
+    assert cache.size <= 80
+
+
+def test_too_large_is_not_cached(files):
+    cache = AttachmentCache(max_bytes=100)
+    encode = Encoder()
+    assert cache.get(files[3], encode) is None
+    assert encode.calls == []
+    assert cache.stats['entries'] == 0
+
+
+def test_invalid_key():
+    with pytest.raises(ValueError):
+        AttachmentCache(key='name')
+
+
+def test_clear(files):
+    cache = AttachmentCache()
+    cache.get(files[0], Encoder())
+    cache.clear()
+    assert cache.stats['entries'] == 0
+    assert cache.size == 0
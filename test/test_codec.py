@@ -0,0 +1,31 @@
+import pytest
+
+from sparkpost.codec import JSONCodec, get_codec
+from sparkpost.exceptions import SparkPostException
+
+
+def test_json_codec():
+    codec = JSONCodec()
+    assert codec.dumps({'a': [1, 'b']}) == '{"a": [1, "b"]}'
+    assert codec.loads(b'{"a": 1}') == {'a': 1}
+    assert codec.loads('{"a": 1}') == {'a': 1}
+
+
+def test_get_codec_default():
+    assert isinstance(get_codec(), JSONCodec)
+
+
+def test_get_codec_auto():
+    codec = get_codec('auto')
+    assert codec.loads(codec.dumps({'a': 1})) == {'a': 1}
+
+
+def test_get_codec_unknown():
+    with pytest.raises(SparkPostException):
+        get_codec('yaml')
+
+
+def test_get_codec_not_installed(monkeypatch):
+    monkeypatch.setitem(__import__('sys').modules, 'orjson', None)
+    with pytest.raises(SparkPostException):
+        get_codec('orjson')
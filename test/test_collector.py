@@ -0,0 +1,125 @@
+import threading
+
+import responses
+
+from sparkpost import SparkPost
+from sparkpost.base import RequestsTransport
+from sparkpost.collector import MetricsCollector
+from sparkpost.hooks import Hooks, RequestContext
+from sparkpost.retry import RetryPolicy
+
+
+URI = 'https://api.sparkpost.com/api/v1'
+
+
+def call(collector, elapsed=0.02, status=200, attempts=1, result=None,
+         resource='templates', method='GET'):
+    context = RequestContext(Hooks(), method, resource, 'uri', resource,
+                             request_bytes=10)
+    collector.on_request(context)
+    context.status = status
+    context.attempts = attempts
+    context.response_bytes = 20
+    context.elapsed = elapsed
+    context.result = result
+    collector.on_response(context)
+
+
+def test_histogram():
+    collector = MetricsCollector(buckets=(0.1, 1))
+    call(collector, elapsed=0.05)
+    call(collector, elapsed=0.1)
+    call(collector, elapsed=2)
+    call(collector, status=None)
+
+    requests = collector.snapshot()['requests']
+    ok = requests[('templates', 'GET', '200')]
+    assert ok['count'] == 3
+    assert ok['sum'] == 2.15
+    assert ok['buckets'] == [(0.1, 2), (1, 2), (float('inf'), 3)]
+    assert requests[('templates', 'GET', 'error')]['count'] == 1
+
+
+def test_counters():
+    collector = MetricsCollector()
+    call(collector, attempts=3)
+    call(collector, resource='transmissions', method='POST',
+         result={'total_accepted_recipients': 2,
+                 'total_rejected_recipients': 1})
+    context = RequestContext(Hooks(), 'GET', 'templates', 'uri', 'templates')
+    collector.on_request(context)
+
+    stats = collector.snapshot()
+    assert stats['in_flight'] == {('templates', 'GET'): 1,
+                                  ('transmissions', 'POST'): 0}
+    assert stats['retries'] == {('templates', 'GET'): 2}
+    assert stats['bytes_sent'] == {'templates': 10, 'transmissions': 10}
+    assert stats['bytes_received'] == {'templates': 20, 'transmissions': 20}
+    assert stats['recipients'] == {'accepted': 2, 'rejected': 1}
+
+
+def test_threads():
+    collector = MetricsCollector()
+
+    def work():
+        for _ in range(1000):
+            call(collector)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    call(collector)
+
+    stats = collector.snapshot()
+    assert stats['requests'][('templates', 'GET', '200')]['count'] == 8001
+    assert stats['in_flight'] == {('templates', 'GET'): 0}
+    # Shards of finished threads are folded together
+    assert len(collector._shards) == 1
+    assert collector.snapshot() == stats
+
+
+def test_expose():
+    collector = MetricsCollector(buckets=(0.1,))
+    call(collector, elapsed=0.05, resource='templates/"x"')
+    text = collector.expose()
+    lines = text.splitlines()
+    assert '# TYPE sparkpost_request_duration_seconds histogram' in lines
+    assert ('sparkpost_request_duration_seconds_bucket{method="GET",'
+            'resource="templates/\\"x\\"",status="200",le="0.1"} 1') in lines
+    assert ('sparkpost_request_duration_seconds_bucket{method="GET",'
+            'resource="templates/\\"x\\"",status="200",le="+Inf"} 1') in lines
+    assert 'sparkpost_recipients_total{outcome="accepted"} 0' in lines
+    assert '# UNIT sparkpost_sent_bytes bytes' in lines
+    assert 'sparkpost_sent_bytes_total{resource="templates/\\"x\\""} 10' \
+        in lines
+    assert text.endswith('# EOF\n')
+
+
+def test_expose_unit_names():
+    collector = MetricsCollector()
+    call(collector)
+    units = [line.split()[2:] for line in collector.expose().splitlines()
+             if line.startswith('# UNIT ')]
+    assert units
+    for name, unit in units:
+        assert name.endswith('_' + unit)
+
+
+@responses.activate
+def test_install():
+    responses.add(responses.GET, URI + '/templates', status=503)
+    responses.add(responses.GET, URI + '/templates', status=200,
+                  content_type='application/json', body='{"results": []}')
+    transport = RequestsTransport(retry=RetryPolicy(backoff_factor=0))
+    sp = SparkPost('fake-key', transport=transport)
+    collector = MetricsCollector().install(sp.hooks)
+    sp.templates.list()
+
+    stats = collector.snapshot()
+    assert stats['requests'][('templates', 'GET', '200')]['count'] == 1
+    assert stats['retries'] == {('templates', 'GET'): 1}
+
+    collector.uninstall(sp.hooks)
+    assert not sp.hooks.active
@@ -0,0 +1,48 @@
+import gzip
+import io
+
+import pytest
+
+from sparkpost.compression import GzipCompression
+
+
+def decompress(data):
+    return gzip.GzipFile(fileobj=io.BytesIO(data)).read()
+
+
+def test_compresses_large_bodies():
+    compression = GzipCompression(threshold=100)
+    body = '{"html": "%s"}' % ('<p>hello</p>' * 100)
+    headers, data = compression.compress({'Authorization': 'key'}, body)
+    assert headers == {'Authorization': 'key', 'Content-Encoding': 'gzip'}
+    assert decompress(data) == body.encode('utf-8')
+    stats = compression.stats
+    assert stats['requests'] == 1
+    assert stats['bytes_in'] == len(body)
+    assert stats['bytes_out'] == len(data)
+    assert stats['bytes_saved'] == len(body) - len(data)
+
+
+def test_skips_small_bodies():
+    compression = GzipCompression(threshold=100)
+    headers = {'Authorization': 'key'}
+    assert compression.compress(headers, '{}') == (headers, b'{}')
+    assert compression.stats['requests'] == 0
+
+
+def test_skips_incompressible_bodies():
+    compression = GzipCompression(threshold=1)
+    headers = {'Authorization': 'key'}
+    assert compression.compress(headers, b'x') == (headers, b'x')
+
+
+def test_skips_streamed_bodies():
+    compression = GzipCompression(threshold=1)
+    body = io.BytesIO(b'x' * 1000)
+    headers = {'Authorization': 'key'}
+    assert compression.compress(headers, body) == (headers, body)
+
+
+def test_invalid_level():
+    with pytest.raises(ValueError):
+        GzipCompression(level=10)
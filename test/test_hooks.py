@@ -0,0 +1,133 @@
+import pytest
+import responses
+
+from sparkpost import SparkPost
+from sparkpost.base import RequestsTransport
+from sparkpost.compression import GzipCompression
+from sparkpost.exceptions import SparkPostAPIException
+from sparkpost.hooks import Hooks
+from sparkpost.retry import RetryPolicy
+
+
+URI = 'https://api.sparkpost.com/api/v1'
+
+
+def record(hooks):
+    events = []
+    for event in Hooks.events:
+        hooks.register(event,
+                       lambda context, event=event: events.append(
+                           (event, context)))
+    return events
+
+
+def test_register_and_unregister():
+    hooks = Hooks()
+    assert not hooks.active
+
+    @hooks.register('post_response')
+    def callback(context):
+        pass
+
+    assert hooks.active
+    hooks.unregister('post_response', callback)
+    assert not hooks.active
+
+
+def test_unknown_event():
+    with pytest.raises(ValueError):
+        Hooks().register('before', lambda context: None)
+
+
+def test_resources_share_client_hooks():
+    sp = SparkPost('fake-key')
+    assert sp.transmissions.hooks is sp.hooks
+    assert sp.metrics.campaigns.hooks is sp.hooks
+
+
+@responses.activate
+def test_hooks_receive_context():
+    responses.add(responses.GET, URI + '/transmissions/abc', status=200,
+                  content_type='application/json',
+                  body='{"results": {"transmission": {"id": "abc"}}}')
+    sp = SparkPost('fake-key')
+    events = record(sp.hooks)
+    assert sp.transmissions.get('abc') == {'id': 'abc'}
+
+    assert [event for event, _ in events] == ['pre_request',
+                                              'post_response']
+    context = events[1][1]
+    assert context.method == 'GET'
+    assert context.resource == 'transmissions'
+    assert context.uri == URI + '/transmissions/abc'
+    assert context.uri_template == 'transmissions/{id}'
+    assert context.status == 200
+    assert context.attempts == 1
+    assert context.response_bytes > 0
+    assert context.ttfb >= 0
+    assert context.elapsed >= 0
+    assert context.result == {'transmission': {'id': 'abc'}}
+    assert context.error is None
+
+
+@responses.activate
+def test_hooks_on_error():
+    responses.add(responses.POST, URI + '/transmissions', status=400,
+                  content_type='application/json',
+                  body='{"errors": []}')
+    sp = SparkPost('fake-key')
+    events = record(sp.hooks)
+    with pytest.raises(SparkPostAPIException):
+        sp.transmissions.send(recipients=['a@example.com'], text='hi')
+
+    assert [event for event, _ in events] == ['pre_request', 'on_error']
+    context = events[1][1]
+    assert context.uri_template == 'transmissions'
+    assert context.status == 400
+    assert isinstance(context.error, SparkPostAPIException)
+
+
+@responses.activate
+def test_hooks_count_retries_and_compression():
+    responses.add(responses.POST, URI + '/templates', status=503)
+    responses.add(responses.POST, URI + '/templates', status=200,
+                  content_type='application/json', body='{"results": {}}')
+    transport = RequestsTransport(
+        retry=RetryPolicy(backoff_factor=0, methods=['POST']),
+        compression=GzipCompression(threshold=10))
+    sp = SparkPost('fake-key', transport=transport)
+    events = record(sp.hooks)
+    sp.templates.create(name='t', from_email='a@example.com',
+                        html='<p>hello</p>' * 100)
+
+    context = events[-1][1]
+    assert context.attempts == 2
+    assert context.status == 200
+    assert context.bytes_saved > 0
+    assert context.request_bytes == len(responses.calls[0].request.body)
+
+
+@responses.activate
+def test_template_preview_uri_template():
+    responses.add(responses.POST, URI + '/templates/abc/preview',
+                  status=200, content_type='application/json',
+                  body='{"results": {}}')
+    sp = SparkPost('fake-key')
+    events = record(sp.hooks)
+    sp.templates.preview('abc', {})
+    assert events[-1][1].uri_template == 'templates/{id}/preview'
+
+
+def test_transport_without_context_support():
+    calls = []
+
+    class Transport(object):
+        def request(self, method, uri, headers, **kwargs):
+            calls.append(kwargs)
+            return []
+
+    sp = SparkPost('fake-key', transport=Transport())
+    events = record(sp.hooks)
+    assert sp.templates.list() == []
+    assert 'context' not in calls[0]
+    assert events == []
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from sparkpost.idempotency import IN_FLIGHT, IdempotencyStore, payload_key
+from sparkpost.streaming import Base64File
+
+
+def test_payload_key_is_deterministic():
+    first = {'content': {'text': 'hi', 'subject': 's'}, 'recipients': [1]}
+    second = {'recipients': [1], 'content': {'subject': 's', 'text': 'hi'}}
+    assert payload_key(first) == payload_key(second)
+    assert payload_key(first) != payload_key({'recipients': [2]})
+
+
+def test_payload_key_with_streamed_file(tmpdir):
+    path = tmpdir.join('file.txt')
+    path.write('hello')
+    payload = {'attachments': [{'data': Base64File(str(path))}]}
+    assert payload_key(payload) == payload_key(
+        {'attachments': [{'data': Base64File(str(path))}]})
+
+
+def test_store_records_results():
+    store = IdempotencyStore()
+    assert store.begin('a') is None
+    store.finish('a', {'id': '1'})
+    assert 'a' in store
+    assert store.begin('a') == {'id': '1'}
+    assert store.stats == {'hits': 1, 'entries': 1, 'in_flight': 0}
+
+
+def test_store_forgets_failures():
+    store = IdempotencyStore()
+    assert store.begin('a') is None
+    store.finish('a', sent=False)
+    assert 'a' not in store
+    assert store.begin('a') is None
+
+
+def test_store_is_bounded():
+    store = IdempotencyStore(max_entries=2)
+    for key in 'abc':
+        store.begin(key)
+        store.finish(key, key)
+    assert len(store) == 2
+    assert 'a' not in store
+    assert 'c' in store
+
+
+def test_store_expires_entries():
+    store = IdempotencyStore(ttl=0.01)
+    store.begin('a')
+    store.finish('a', 'result')
+    time.sleep(0.02)
+    assert 'a' not in store
+    assert store.begin('a') is None
+
+
+def test_store_serializes_concurrent_sends():
+    store = IdempotencyStore()
+    assert store.begin('a') is None
+    results = []
+    thread = threading.Thread(target=lambda: results.append(store.begin('a')))
+    thread.start()
+    time.sleep(0.01)
+    assert results == []
+    store.finish('a', 'first')
+    thread.join()
+    assert results == ['first']
+
+
+def test_store_try_begin_does_not_wait():
+    store = IdempotencyStore()
+    assert store.try_begin('a') is None
+    assert store.try_begin('a') is IN_FLIGHT
+    store.finish('a', 'first')
+    assert store.try_begin('a') == 'first'
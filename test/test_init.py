@@ -1,9 +1,47 @@
 import pytest
 
 from sparkpost import SparkPost
+from sparkpost.base import RequestsTransport
 from sparkpost.exceptions import SparkPostException
 
 
 def test_no_api_key():
     with pytest.raises(SparkPostException):
         SparkPost()
+
+
+def test_resources_share_transport():
+    sp = SparkPost('fake-key')
+    transport = sp.transport
+    assert sp.metrics.campaigns.transport is transport
+    assert sp.metrics.domains.transport is transport
+    assert sp.recipient_lists.transport is transport
+    assert sp.suppression_list.transport is transport
+    assert sp.templates.transport is transport
+    assert sp.transmissions.transport is transport
+
+
+def test_transport_shared_between_clients():
+    transport = RequestsTransport(pool_maxsize=4)
+    sp1 = SparkPost('fake-key', transport=transport)
+    sp2 = SparkPost('other-key', transport=transport)
+    assert sp1.transmissions.transport is transport
+    assert sp2.templates.transport is transport
+
+
+def test_resources_are_lazy():
+    sp = SparkPost('fake-key')
+    assert 'transmissions' not in sp.__dict__
+    assert 'templates' not in sp.__dict__
+    transmissions = sp.transmissions
+    assert sp.__dict__['transmissions'] is transmissions
+    assert sp.transmissions is transmissions
+    assert sp.transmission is transmissions
+    assert 'templates' not in sp.__dict__
+
+
+def test_transport_session_is_lazy():
+    sp = SparkPost('fake-key')
+    sp.transmissions
+    assert sp.transport._sess is None
+    assert sp.transport.sess is sp.transport.sess
@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+
+import pytest
+import responses
+
+from sparkpost import SparkPost
+from sparkpost.exceptions import SparkPostAPIException, SparkPostException
+from sparkpost.outbox import MemoryOutbox, Outbox
+from sparkpost.retry import RetryPolicy
+
+
+URI = 'https://api.sparkpost.com/api/v1/transmissions'
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('outbox.db'))
+
+
+def no_wait_retry(**kwargs):
+    return RetryPolicy(backoff_factor=0, jitter=False,
+                       methods=['POST'], **kwargs)
+
+
+@responses.activate
+def test_send_is_queued_until_flush(path):
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    outbox = Outbox(SparkPost('fake-key').transmissions, path)
+    local_id = outbox.send(recipients=['a@example.com'], text='hello')
+
+    assert len(responses.calls) == 0
+    assert outbox.status(local_id)['status'] == 'pending'
+    assert outbox.stats['pending'] == 1
+
+    assert outbox.flush() == 1
+    body = json.loads(responses.calls[0].request.body)
+    assert body['recipients'] == [{'address': {'email': 'a@example.com'}}]
+    assert body['metadata'] == {'idempotency_key': local_id}
+    status = outbox.status(local_id)
+    assert status['status'] == 'sent'
+    assert status['attempts'] == 1
+    assert status['result'] == {'id': '12345'}
+    assert outbox.stats['sent'] == 1
+    assert outbox.stats['oldest_pending_age'] == 0
+    outbox.close()
+
+
+def test_unknown_id(path):
+    outbox = Outbox(SparkPost('fake-key').transmissions, path)
+    assert outbox.status('nope') is None
+    outbox.close()
+
+
+@responses.activate
+def test_retries_then_sends(path):
+    responses.add(responses.POST, URI, status=503)
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    outbox = Outbox(SparkPost('fake-key').transmissions, path,
+                    retry=no_wait_retry())
+    local_id = outbox.send(recipients=['a@example.com'], text='hello')
+
+    assert outbox.flush() == 2
+    status = outbox.status(local_id)
+    assert status['status'] == 'sent'
+    assert status['attempts'] == 2
+    outbox.close()
+
+
+@responses.activate
+def test_client_error_is_not_retried(path):
+    responses.add(responses.POST, URI, status=400,
+                  content_type='application/json',
+                  body='{"errors": [{"message": "invalid"}]}')
+    outbox = Outbox(SparkPost('fake-key').transmissions, path,
+                    retry=no_wait_retry())
+    local_id = outbox.send(recipients=['a@example.com'], text='hello')
+
+    assert outbox.flush() == 1
+    status = outbox.status(local_id)
+    assert status['status'] == 'failed'
+    assert 'invalid' in status['error']
+    assert outbox.purge() == 1
+    assert outbox.status(local_id) is None
+    outbox.close()
+
+
+@responses.activate
+def test_gives_up_after_max_attempts(path):
+    responses.add(responses.POST, URI, status=500)
+    outbox = Outbox(SparkPost('fake-key').transmissions, path,
+                    retry=no_wait_retry(max_attempts=3))
+    local_id = outbox.send(recipients=['a@example.com'], text='hello')
+
+    assert outbox.flush() == 3
+    assert outbox.status(local_id)['status'] == 'failed'
+    assert outbox.status(local_id)['attempts'] == 3
+    outbox.close()
+
+
+@responses.activate
+def test_survives_restart(path):
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    transmissions = SparkPost('fake-key').transmissions
+    outbox = Outbox(transmissions, path)
+    first = outbox.send(recipients=['a@example.com'], text='hello')
+    second = outbox.send(recipients=['b@example.com'], text='hello')
+    # Simulate a crash in the middle of a send
+    outbox._claim()
+    assert outbox.status(first)['status'] == 'sending'
+    outbox._db.close()
+
+    outbox = Outbox(transmissions, path)
+    assert outbox.stats['pending'] == 2
+    assert outbox.flush() == 2
+    assert outbox.status(first)['status'] == 'sent'
+    assert outbox.status(second)['status'] == 'sent'
+    outbox.close()
+
+
+@responses.activate
+def test_background_flusher(path):
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    with Outbox(SparkPost('fake-key').transmissions, path,
+                poll_interval=0.01) as outbox:
+        ids = [outbox.send(recipients=['%d@example.com' % i], text='hello')
+               for i in range(10)]
+        deadline = time.time() + 5
+        while outbox.stats['sent'] < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        assert [outbox.status(i)['status'] for i in ids] == ['sent'] * 10
+    assert len(responses.calls) == 10
+
+
+@responses.activate
+def test_memory_outbox():
+    responses.add(responses.POST, URI, status=503)
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    outbox = MemoryOutbox(SparkPost('fake-key').transmissions,
+                          retry=no_wait_retry())
+    local_id = outbox.send(recipients=['a@example.com'], text='hello')
+    assert len(responses.calls) == 0
+    assert outbox.stats['pending'] == 1
+
+    outbox.flush()
+    assert len(responses.calls) == 2
+    body = json.loads(responses.calls[1].request.body)
+    assert body['metadata'] == {'idempotency_key': local_id}
+    stats = outbox.stats
+    assert (stats['pending'], stats['sending'], stats['sent'],
+            stats['failed']) == (0, 0, 1, 0)
+    assert stats['oldest_pending_age'] == 0
+
+
+@responses.activate
+def test_memory_outbox_failures():
+    responses.add(responses.POST, URI, status=400,
+                  content_type='application/json',
+                  body='{"errors": [{"message": "invalid"}]}')
+    outbox = MemoryOutbox(SparkPost('fake-key').transmissions, maxsize=1,
+                          retry=no_wait_retry())
+    outbox.send(recipients=['a@example.com'], text='hello')
+    with pytest.raises(SparkPostException):
+        outbox.send(recipients=['b@example.com'], text='hello')
+
+    outbox.flush()
+    assert len(responses.calls) == 1
+    assert outbox.stats['failed'] == 1
+    kwargs, error = outbox.errors[0]
+    assert kwargs['recipients'] == ['a@example.com']
+    assert isinstance(error, SparkPostAPIException)
+
+
+@responses.activate
+def test_memory_outbox_delivers_before_stopping():
+    def slow_send(request):
+        time.sleep(0.01)
+        return (200, {}, '{"results": {"id": "12345"}}')
+
+    responses.add_callback(responses.POST, URI, callback=slow_send,
+                           content_type='application/json')
+    with MemoryOutbox(SparkPost('fake-key').transmissions,
+                      concurrency=2) as outbox:
+        for index in range(10):
+            outbox.send(recipients=['a%d@example.com' % index],
+                        text='hello')
+    assert len(responses.calls) == 10
+    assert outbox.stats['sent'] == 10
+
+
+@responses.activate
+def test_memory_outbox_stop_timeout_with_full_queue():
+    started = threading.Event()
+
+    def slow_send(request):
+        started.set()
+        time.sleep(0.5)
+        return (200, {}, '{"results": {"id": "12345"}}')
+
+    responses.add_callback(responses.POST, URI, callback=slow_send,
+                           content_type='application/json')
+    outbox = MemoryOutbox(SparkPost('fake-key').transmissions, maxsize=1,
+                          concurrency=1)
+    outbox.start()
+    outbox.send(recipients=['a@example.com'], text='hello')
+    assert started.wait(1)
+    outbox.send(recipients=['b@example.com'], text='hello')
+
+    threads = list(outbox._threads)
+    before = time.time()
+    outbox.stop(timeout=0.1)
+    assert time.time() - before < 0.4
+    # The queued message is still delivered before the thread exits
+    for thread in threads:
+        thread.join()
+    assert len(responses.calls) == 2
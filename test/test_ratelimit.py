@@ -0,0 +1,75 @@
+import threading
+
+import mock
+import pytest
+
+from sparkpost.ratelimit import RateLimiter, TokenBucket
+
+
+def test_bucket_burst_then_wait():
+    with mock.patch('sparkpost.ratelimit.time.time', return_value=100.0):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5
+        assert bucket.reserve() == 1.0
+
+
+def test_bucket_refills():
+    with mock.patch('sparkpost.ratelimit.time.time') as now:
+        now.return_value = 100.0
+        bucket = TokenBucket(rate=1)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 1.0
+        now.return_value = 102.0
+        assert bucket.reserve() == 0
+
+
+def test_bucket_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_bucket_shared_between_threads():
+    with mock.patch('sparkpost.ratelimit.time.time', return_value=100.0):
+        bucket = TokenBucket(rate=10, capacity=10)
+        delays = []
+        lock = threading.Lock()
+
+        def worker():
+            delay = bucket.reserve()
+            with lock:
+                delays.append(delay)
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert sorted(delays) == [0] * 10 + [i / 10.0 for i in range(1, 11)]
+
+
+def test_limiter_per_resource():
+    transmissions = TokenBucket(1)
+    suppression = TokenBucket(1)
+    default = TokenBucket(1)
+    limiter = RateLimiter(default=default, per_resource={
+        'transmissions': transmissions,
+        'suppression-list': suppression,
+    })
+    base = 'https://api.sparkpost.com/api/v1/'
+    assert limiter.bucket_for(base + 'transmissions') is transmissions
+    assert limiter.bucket_for(base + 'transmissions/123') is transmissions
+    assert limiter.bucket_for(base + 'suppression-list/a@b.com') is suppression
+    assert limiter.bucket_for(base + 'templates') is default
+    assert RateLimiter().reserve(base + 'templates') == 0
+
+
+def test_limiter_acquire_sleeps():
+    limiter = RateLimiter(default=TokenBucket(1))
+    with mock.patch('sparkpost.ratelimit.time.sleep') as sleep:
+        limiter.acquire('uri')
+        assert not sleep.called
+        limiter.acquire('uri')
+        assert sleep.call_count == 1
+        assert 0 < sleep.call_args[0][0] <= 1
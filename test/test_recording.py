@@ -0,0 +1,136 @@
+import json
+import time
+
+import pytest
+import responses
+
+from sparkpost import SparkPost
+from sparkpost.exceptions import SparkPostAPIException, SparkPostException
+from sparkpost.hooks import POST_RESPONSE
+from sparkpost.recording import RecordingTransport, ReplayTransport
+from sparkpost.retry import RetryPolicy
+
+
+URI = 'https://api.sparkpost.com/api/v1/transmissions'
+
+
+def record(path, **kwargs):
+    transport = RecordingTransport(str(path), **kwargs)
+    sp = SparkPost('fake-key', transport=transport)
+    responses.add(responses.POST, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "12345"}}')
+    responses.add(responses.POST, URI, status=400,
+                  content_type='application/json',
+                  body='{"errors": [{"message": "invalid"}]}')
+    responses.add(responses.GET, URI, status=200,
+                  content_type='application/json',
+                  body='{"results": [{"id": "12345"}]}')
+    assert sp.transmissions.send(recipients=['a@example.com'],
+                                 text='hello') == {'id': '12345'}
+    with pytest.raises(SparkPostAPIException):
+        sp.transmissions.send(recipients=['a@example.com'], text='hello')
+    sp.transmissions.list(campaign_id='c')
+    transport.close()
+
+
+@responses.activate
+def test_records_exchanges(tmpdir):
+    path = tmpdir.join('recording.jsonl')
+    record(path)
+    records = [json.loads(line) for line in path.readlines()]
+    assert [(r['method'], r['status']) for r in records] == [
+        ('POST', 200), ('POST', 400), ('GET', 200)]
+    first = records[0]
+    assert first['uri'] == URI
+    assert json.loads(first['request']['body'])['recipients'] == [
+        {'address': {'email': 'a@example.com'}}]
+    assert first['response'] == {'body': '{"results": {"id": "12345"}}'}
+    assert first['headers'] == {'Content-Type': 'application/json'}
+    assert first['elapsed'] >= 0
+    assert records[2]['params'] == {'campaign_id': 'c'}
+    assert 'fake-key' not in path.read()
+
+
+@responses.activate
+def test_records_without_request_bodies(tmpdir):
+    path = tmpdir.join('recording.jsonl')
+    record(path, request_bodies=False)
+    assert all('request' not in json.loads(line)
+               for line in path.readlines())
+
+
+@responses.activate
+def test_replays_in_order(tmpdir):
+    path = tmpdir.join('recording.jsonl.gz')
+    record(path)
+    transport = ReplayTransport(str(path))
+    # Hosts are ignored when matching
+    sp = SparkPost('fake-key', base_uri='api.eu.sparkpost.com',
+                   transport=transport)
+    responses.reset()
+
+    assert sp.transmissions.send(recipients=['b@example.com'],
+                                 text='hi') == {'id': '12345'}
+    with pytest.raises(SparkPostAPIException) as excinfo:
+        sp.transmissions.send(recipients=['b@example.com'], text='hi')
+    assert excinfo.value.status == 400
+    assert excinfo.value.errors[0].startswith('invalid')
+    # Looped back to the first response
+    assert sp.transmissions.send(recipients=['b@example.com'],
+                                 text='hi') == {'id': '12345'}
+    assert sp.transmissions.list(campaign_id='c') == [{'id': '12345'}]
+    assert len(responses.calls) == 0
+
+
+@responses.activate
+def test_replay_unmatched_and_used_up(tmpdir):
+    path = tmpdir.join('recording.jsonl')
+    record(path)
+    sp = SparkPost('fake-key',
+                   transport=ReplayTransport(str(path), loop=False))
+    with pytest.raises(SparkPostException):
+        sp.transmissions.list(campaign_id='other')
+    sp.transmissions.list(campaign_id='c')
+    with pytest.raises(SparkPostException):
+        sp.transmissions.list(campaign_id='c')
+
+
+@responses.activate
+def test_replay_speed(tmpdir):
+    path = tmpdir.join('recording.jsonl')
+    path.write(json.dumps({
+        'method': 'GET', 'uri': URI, 'params': None, 'status': 200,
+        'elapsed': 0.2, 'ttfb': 0.1,
+        'response': {'body': '{"results": []}'}}) + '\n')
+
+    sp = SparkPost('fake-key', transport=ReplayTransport(str(path)))
+    started = time.time()
+    sp.transmissions.list()
+    assert time.time() - started < 0.1
+
+    sp = SparkPost('fake-key', transport=ReplayTransport(str(path), speed=2))
+    started = time.time()
+    sp.transmissions.list()
+    assert time.time() - started >= 0.1
+
+
+@responses.activate
+def test_replay_retries_and_hooks(tmpdir):
+    path = tmpdir.join('recording.jsonl')
+    with open(str(path), 'w') as a_file:
+        for status, body in ((503, '{"errors": []}'),
+                             (200, '{"results": {"id": "1"}}')):
+            a_file.write(json.dumps({
+                'method': 'POST', 'uri': URI, 'status': status,
+                'response': {'body': body}}) + '\n')
+    transport = ReplayTransport(
+        str(path), retry=RetryPolicy(backoff_factor=0,
+                                     methods=frozenset(['POST'])))
+    sp = SparkPost('fake-key', transport=transport)
+    contexts = []
+    sp.hooks.register(POST_RESPONSE, contexts.append)
+    assert sp.transmissions.send(recipients=['a@example.com'],
+                                 text='hello') == {'id': '1'}
+    assert contexts[0].attempts == 2
+    assert contexts[0].status == 200
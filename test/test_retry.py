@@ -0,0 +1,86 @@
+import time
+from email.utils import formatdate
+
+from sparkpost.retry import IDEMPOTENT_METHODS, RetryBudget, RetryPolicy
+
+
+def create_policy(**kwargs):
+    kwargs.setdefault('jitter', False)
+    kwargs.setdefault('backoff_factor', 1)
+    return RetryPolicy(**kwargs)
+
+
+def test_exponential_backoff():
+    policy = create_policy(max_attempts=5, max_backoff=3)
+    assert policy.next_delay('GET', 1, 503) == 1
+    assert policy.next_delay('GET', 2, 503) == 2
+    assert policy.next_delay('GET', 3, 503) == 3
+    assert policy.retries == 3
+
+
+def test_jitter_stays_below_backoff():
+    policy = RetryPolicy(backoff_factor=1, jitter=True)
+    for _ in range(20):
+        assert 0 <= policy.backoff(2) <= 2
+
+
+def test_give_up_after_max_attempts():
+    policy = create_policy(max_attempts=2)
+    assert policy.next_delay('GET', 1, 500) == 1
+    assert policy.next_delay('GET', 2, 500) is None
+    assert policy.stats == {'retries': 1, 'give_ups': 1}
+
+
+def test_non_retryable_status():
+    policy = create_policy()
+    assert policy.next_delay('GET', 1, 400) is None
+    assert policy.stats == {'retries': 0, 'give_ups': 0}
+
+
+def test_connection_errors_are_retried():
+    policy = create_policy()
+    assert policy.next_delay('GET', 1) == 1
+
+
+def test_only_idempotent_methods_by_default():
+    policy = create_policy()
+    assert policy.next_delay('POST', 1, 503) is None
+    policy = create_policy(methods=IDEMPOTENT_METHODS | set(['POST']))
+    assert policy.next_delay('post', 1, 503) == 1
+
+
+def test_retry_after_seconds():
+    policy = create_policy()
+    assert policy.next_delay('GET', 1, 429, '7') == 7
+    policy = create_policy(respect_retry_after=False)
+    assert policy.next_delay('GET', 1, 429, '7') == 1
+
+
+def test_retry_after_too_long_gives_up():
+    policy = create_policy(max_backoff=10)
+    assert policy.next_delay('GET', 1, 429, '60') is None
+    assert policy.give_ups == 1
+
+
+def test_retry_after_http_date():
+    value = formatdate(time.time() + 5, usegmt=True)
+    assert 3 < RetryPolicy.parse_retry_after(value) <= 5
+    assert RetryPolicy.parse_retry_after('garbage') is None
+    assert RetryPolicy.parse_retry_after(None) is None
+
+
+def test_budget_stops_retry_storm():
+    policy = create_policy(budget=RetryBudget(ratio=0.5, initial_tokens=1))
+    assert policy.next_delay('GET', 1, 503) == 1
+    assert policy.next_delay('GET', 1, 503) is None
+    policy.on_request()
+    policy.on_request()
+    assert policy.next_delay('GET', 1, 503) == 1
+    assert policy.stats == {'retries': 2, 'give_ups': 1}
+
+
+def test_budget_is_capped():
+    budget = RetryBudget(ratio=1, initial_tokens=0, max_tokens=2)
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
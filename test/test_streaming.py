@@ -0,0 +1,88 @@
+import base64
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import pytest
+
+from sparkpost.codec import JSONCodec
+from sparkpost.streaming import READ_SIZE, Base64File, StreamingBody
+
+
+@pytest.fixture
+def big_file():
+    content = os.urandom(READ_SIZE * 2 + 7)
+    fd, path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as a_file:
+        a_file.write(content)
+    yield path, content
+    os.unlink(path)
+
+
+def test_base64_file(big_file):
+    path, content = big_file
+    encoded = base64.b64encode(content)
+    a_file = Base64File(path)
+    assert len(a_file) == len(encoded)
+    assert b''.join(a_file) == encoded
+    assert a_file.encode() == encoded.decode('ascii')
+
+
+def test_streaming_body_from_payload(big_file):
+    path, content = big_file
+    attachment = {'name': 'a.bin', 'data': Base64File(path)}
+    payload = {'content': {'subject': u'caf\xe9', 'attachments': [attachment]}}
+    body = StreamingBody.from_payload(payload, JSONCodec(), [attachment])
+
+    data = body.read()
+    assert len(data) == len(body)
+    decoded = json.loads(data.decode('utf-8'))
+    assert decoded['content']['subject'] == u'caf\xe9'
+    assert base64.b64decode(
+        decoded['content']['attachments'][0]['data']) == content
+
+
+def test_streaming_body_from_payload_out_of_order(big_file):
+    path, content = big_file
+    attachment = {'name': 'a.bin', 'data': Base64File(path)}
+    image = {'name': 'image', 'data': Base64File(__file__)}
+    payload = {'content': OrderedDict([('inline_images', [image]),
+                                       ('attachments', [attachment])])}
+    body = StreamingBody.from_payload(payload, JSONCodec(),
+                                      [attachment, image])
+
+    decoded = json.loads(body.read().decode('utf-8'))['content']
+    assert base64.b64decode(decoded['attachments'][0]['data']) == content
+    with open(__file__, 'rb') as a_file:
+        assert base64.b64decode(
+            decoded['inline_images'][0]['data']) == a_file.read()
+
+
+def test_streaming_body_read_in_chunks(big_file):
+    path, _ = big_file
+    body = StreamingBody([b'{"data": "', Base64File(path), b'"}'])
+    expected = body.read()
+    body.seek(0)
+    chunks = []
+    while True:
+        chunk = body.read(1000)
+        if not chunk:
+            break
+        assert len(chunk) <= 1000
+        chunks.append(chunk)
+        assert body.tell() == sum(len(c) for c in chunks)
+    assert b''.join(chunks) == expected
+    body.seek(0)
+    assert b''.join(body) == expected
+
+
+def test_streaming_body_seek():
+    body = StreamingBody([b'abc', b'def'])
+    assert body.read(2) == b'ab'
+    assert body.seek(0, 2) == 6
+    assert body.read() == b''
+    body.seek(0)
+    assert body.read() == b'abcdef'
+    with pytest.raises(IOError):
+        body.seek(3)
@@ -9,6 +9,8 @@ import responses
 
 from sparkpost import SparkPost
 from sparkpost import Templates
+from sparkpost.base import RequestsTransport
+from sparkpost.codec import JSONCodec
 from sparkpost.exceptions import SparkPostAPIException
 
 
@@ -216,3 +218,22 @@ def test_fail_preview():
     with pytest.raises(SparkPostAPIException):
         sp = SparkPost('fake-key')
         sp.templates.preview('foobar', {})
+
+
+@responses.activate
+def test_create_uses_transport_codec():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/templates',
+        status=200,
+        content_type='application/json',
+        body='{"results": "yay"}'
+    )
+
+    class UpperCodec(JSONCodec):
+        def dumps(self, obj):
+            return super(UpperCodec, self).dumps(obj).upper()
+
+    sp = SparkPost('fake-key', transport=RequestsTransport(codec=UpperCodec()))
+    sp.templates.create(name='test')
+    assert '"NAME": "TEST"' in responses.calls[0].request.body
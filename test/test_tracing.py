@@ -0,0 +1,90 @@
+import pytest
+import responses
+
+from sparkpost import SparkPost
+from sparkpost.exceptions import SparkPostAPIException
+from sparkpost.tracing import NOOP_TRACER, OpenTelemetryTracer, Tracer
+
+
+URI = 'https://api.sparkpost.com/api/v1'
+
+
+class RecordingTracer(Tracer):
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    def start_span(self, name, attributes=None):
+        span = {'name': name, 'attributes': dict(attributes), 'phases': []}
+        self.events.append(span)
+        return self
+
+    def set_attribute(self, key, value):
+        self.events[-1]['attributes'][key] = value
+
+    def add_phase(self, parent, name, start, end):
+        assert start <= end
+        self.events[-1]['phases'].append(name)
+
+    def end_span(self, span, error=None):
+        self.events[-1]['error'] = error
+
+
+def test_noop_by_default():
+    sp = SparkPost('fake-key')
+    assert sp.tracer is NOOP_TRACER
+    assert sp.transmissions.tracer is NOOP_TRACER
+    with sp.tracer.span('anything') as span:
+        span.set_attribute('key', 'value')
+
+
+@responses.activate
+def test_request_span():
+    responses.add(responses.GET, URI + '/templates/abc', status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "abc"}}')
+    responses.add(responses.GET, URI + '/templates', status=500)
+    tracer = RecordingTracer()
+    sp = SparkPost('fake-key', tracer=tracer)
+    sp.templates.get('abc')
+    with pytest.raises(SparkPostAPIException):
+        sp.templates.list()
+
+    ok, failed = tracer.events
+    assert ok['name'] == 'SparkPost GET templates/{id}'
+    assert ok['attributes']['url.template'] == 'templates/{id}'
+    assert ok['attributes']['http.response.status_code'] == 200
+    assert ok['phases'] == ['network', 'decode']
+    assert ok['error'] is None
+    assert failed['phases'] == ['network']
+    assert isinstance(failed['error'], SparkPostAPIException)
+
+
+@responses.activate
+def test_opentelemetry_spans():
+    sdk = pytest.importorskip('opentelemetry.sdk.trace')
+    export = pytest.importorskip('opentelemetry.sdk.trace.export')
+    memory = pytest.importorskip(
+        'opentelemetry.sdk.trace.export.in_memory_span_exporter')
+    exporter = memory.InMemorySpanExporter()
+    provider = sdk.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+
+    responses.add(responses.POST, URI + '/transmissions', status=200,
+                  content_type='application/json',
+                  body='{"results": {"id": "1"}}')
+    sp = SparkPost('fake-key', tracer=OpenTelemetryTracer(
+        provider.get_tracer('test')))
+    sp.transmissions.send(recipients=['a@example.com'], text='hi')
+
+    spans = dict((span.name, span) for span in exporter.get_finished_spans())
+    assert set(spans) == set(['sparkpost.build_payload', 'sparkpost.serialize',
+                              'SparkPost POST transmissions', 'network',
+                              'decode'])
+    request = spans['SparkPost POST transmissions']
+    assert request.attributes['http.response.status_code'] == 200
+    for phase in ('network', 'decode'):
+        assert spans[phase].parent.span_id == request.context.span_id
+        assert request.start_time <= spans[phase].start_time
+        assert spans[phase].end_time <= request.end_time
@@ -1,8 +1,10 @@
 import base64
+import copy
 import json
 import os
 import tempfile
 import warnings
+from email.utils import parseaddr
 
 import pytest
 import responses
@@ -11,7 +13,11 @@ from mock import patch
 
 from sparkpost import SparkPost
 from sparkpost import Transmissions
-from sparkpost.exceptions import SparkPostAPIException, SparkPostException
+from sparkpost.cache import AttachmentCache
+from sparkpost.idempotency import IdempotencyStore
+from sparkpost.exceptions import (
+    SparkPostAPIException, SparkPostChunkedSendException, SparkPostException
+)
 
 
 def test_translate_keys_with_list():
@@ -57,6 +63,30 @@ def test_translate_keys_for_email_parsing():
     ]
 
 
+def test_plain_address_fast_path_matches_parseaddr():
+    t = Transmissions('uri', 'key')
+    addresses = ['a@example.com', "o'neil@example.com", 'x+y@example.org',
+                 'Name <name@example.com>', '"Last, First" <lf@example.com>',
+                 "Mary-Jane O'Neil <mj@example.com>", 'Two  Spaces <t@x.com>',
+                 'J. Doe <jd@example.com>', u'Jos\xe9 <j@example.com>',
+                 'a@b@c', 'nodomain', 'a@[127.0.0.1]']
+    results = t._extract_recipients(addresses)
+    for address, result in zip(addresses, results):
+        name, email = parseaddr(address)
+        expected = {'email': email}
+        if name:
+            expected['name'] = name
+        assert result == {'address': expected}
+
+
+def test_parsed_addresses_are_not_shared():
+    t = Transmissions('uri', 'key')
+    first = t._parse_address('Name <name@example.com>')
+    first['header_to'] = 'someone'
+    assert t._parse_address('Name <name@example.com>') == {
+        'name': 'Name', 'email': 'name@example.com'}
+
+
 def test_translate_keys_for_from_email():
     t = Transmissions('uri', 'key')
     results = t._translate_keys(from_email='Testing <testing@example.com>')
@@ -66,6 +96,38 @@ def test_translate_keys_for_from_email():
     }
 
 
+def test_translate_keys_does_not_mutate_input():
+    t = Transmissions('uri', 'key')
+    kwargs = dict(
+        recipients=[{'address': {'email': 'to@example.com'},
+                     'substitution_data': {'name': 'To'}}],
+        cc=['cc@example.com'],
+        bcc=[{'address': {'email': 'bcc@example.com'}}],
+        custom_headers={'X-Header': 'value'},
+        content={'text': 'hello'},
+        options={'sandbox': True},
+        track_opens=True,
+        attachments=[{'type': 'text/plain', 'name': 'a.txt', 'data': 'YQ=='}],
+        metadata={'key': 'value'},
+    )
+    expected = copy.deepcopy(kwargs)
+    results = t._translate_keys(**kwargs)
+    assert kwargs == expected
+    assert results['content']['headers'] == {'X-Header': 'value',
+                                             'CC': 'cc@example.com'}
+    assert results['options'] == {'sandbox': True, 'open_tracking': True}
+    assert results['recipients'][1] == {
+        'address': {'email': 'cc@example.com', 'header_to': 'to@example.com'},
+        'substitution_data': {'name': 'To'}
+    }
+    assert results['recipients'][2] == {
+        'address': {'email': 'bcc@example.com',
+                    'header_to': 'to@example.com'},
+        'substitution_data': {'name': 'To'}
+    }
+    assert results['metadata'] is kwargs['metadata']
+
+
 @responses.activate
 def test_campaign_id():
     responses.add(
@@ -263,6 +325,62 @@ def test_success_send_with_attachments():
         os.unlink(temp_file_path)
 
 
+@responses.activate
+def test_success_send_with_streamed_attachment():
+    content = os.urandom(100 * 1024)
+    fd, temp_file_path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(content)
+    received = []
+
+    def callback(request):
+        assert int(request.headers['Content-Length']) == len(request.body)
+        received.append(json.loads(request.body.read().decode('utf-8')))
+        return (200, {}, '{"results": "yay"}')
+
+    try:
+        responses.add_callback(
+            responses.POST,
+            'https://api.sparkpost.com/api/v1/transmissions',
+            callback=callback,
+            content_type='application/json'
+        )
+        sp = SparkPost('fake-key')
+        sp.transmissions.attachment_stream_threshold = 1024
+        attachment = {
+            "name": "test.bin",
+            "type": "application/octet-stream",
+            "filename": temp_file_path
+        }
+        results = sp.transmissions.send(text='hello',
+                                        attachments=[attachment])
+        assert results == 'yay'
+        data = received[0]["content"]["attachments"][0]["data"]
+        assert base64.b64decode(data) == content
+        assert received[0]["content"]["text"] == 'hello'
+    finally:
+        os.unlink(temp_file_path)
+
+
+def test_attachment_cache():
+    fd, temp_file_path = tempfile.mkstemp()
+    with os.fdopen(fd, 'wb') as temp_file:
+        temp_file.write(b'Hello World')
+    try:
+        t = Transmissions('uri', 'key')
+        t.attachment_cache = AttachmentCache()
+        attachments = [{'name': 'a.txt', 'type': 'text/plain',
+                        'filename': temp_file_path}] * 2
+        for _ in range(3):
+            results = t._translate_keys(attachments=attachments)
+            for attachment in results['content']['attachments']:
+                assert base64.b64decode(attachment['data']) == b'Hello World'
+        assert t.attachment_cache.stats['misses'] == 1
+        assert t.attachment_cache.stats['hits'] == 5
+    finally:
+        os.unlink(temp_file_path)
+
+
 @responses.activate
 def test_success_send_with_inline_images():
     current_dir = os.path.abspath(os.path.dirname(__file__))
@@ -412,3 +530,265 @@ def test_fail_delete():
     with pytest.raises(SparkPostAPIException):
         sp = SparkPost('fake-key')
         sp.transmission.delete('foobar')
+
+
+@responses.activate
+def test_send_many():
+    def callback(request):
+        payload = json.loads(request.body)
+        subject = payload['content']['subject']
+        if subject == 'fail':
+            return (500, {}, '{"errors": [{"message": "failed"}]}')
+        return (200, {}, json.dumps({'results': {
+            'id': subject, 'total_accepted_recipients': 1,
+            'total_rejected_recipients': 0}}))
+
+    responses.add_callback(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        callback=callback,
+        content_type='application/json'
+    )
+    sp = SparkPost('fake-key')
+    subjects = ['one', 'fail', 'three', 'four', 'five']
+    bulk = sp.transmissions.send_many(
+        (dict(recipients=['to@example.com'], subject=subject)
+         for subject in subjects), concurrency=2)
+    results = bulk.results()
+
+    assert [r.index for r in results] == list(range(5))
+    assert [r.kwargs['subject'] for r in results] == subjects
+    assert results[0].result['id'] == 'one'
+    assert results[0].error is None
+    assert results[1].result is None
+    assert isinstance(results[1].error, SparkPostAPIException)
+    assert bulk.stats['sent'] == 4
+    assert bulk.stats['failed'] == 1
+    assert bulk.stats['total_accepted_recipients'] == 4
+    assert bulk.stats['sends_per_second'] > 0
+
+
+def chunk_callback(request):
+    payload = json.loads(request.body)
+    emails = [r['address']['email'] for r in payload['recipients']]
+    if 'fail@example.com' in emails:
+        return (500, {}, '{"errors": [{"message": "failed"}]}')
+    return (200, {}, json.dumps({'results': {
+        'id': emails[0],
+        'total_accepted_recipients': len(emails) - 1,
+        'total_rejected_recipients': 1}}))
+
+
+@responses.activate
+def test_send_chunked():
+    responses.add_callback(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        callback=chunk_callback,
+        content_type='application/json'
+    )
+    sp = SparkPost('fake-key')
+    recipients = ['to%d@example.com' % i for i in range(5)]
+    results = sp.transmissions.send_chunked(
+        chunk_size=2, recipients=recipients, cc=['cc@example.com'],
+        from_email='from@example.com', subject='chunks', text='hello')
+
+    assert len(responses.calls) == 3
+    bodies = [json.loads(call.request.body) for call in responses.calls]
+    sent = sorted(r['address']['email']
+                  for body in bodies for r in body['recipients'])
+    assert sent == sorted(recipients + ['cc@example.com'])
+    for body in bodies:
+        assert len(body['recipients']) <= 2
+        assert body['content']['subject'] == 'chunks'
+        assert body['content']['headers'] == {'CC': 'cc@example.com'}
+        for recipient in body['recipients']:
+            if recipient['address']['email'] == 'cc@example.com':
+                assert recipient['address']['header_to'] == 'to0@example.com'
+
+    assert results['total_accepted_recipients'] == 3
+    assert results['total_rejected_recipients'] == 3
+    assert sorted(results['ids']) == sorted(
+        b['recipients'][0]['address']['email'] for b in bodies)
+    assert results['id'] == results['ids'][0]
+
+
+@responses.activate
+def test_send_chunked_recipient_list():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "1", "total_accepted_recipients": 3, '
+             '"total_rejected_recipients": 0}}'
+    )
+    sp = SparkPost('fake-key')
+    results = sp.transmissions.send_chunked(chunk_size=1,
+                                            recipient_list='my-list')
+    assert len(responses.calls) == 1
+    body = json.loads(responses.calls[0].request.body)
+    assert body['recipients'] == {'list_id': 'my-list'}
+    assert results == {'id': '1', 'ids': ['1'],
+                       'total_accepted_recipients': 3,
+                       'total_rejected_recipients': 0}
+
+
+@responses.activate
+def test_send_chunked_partial_failure():
+    responses.add_callback(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        callback=chunk_callback,
+        content_type='application/json'
+    )
+    sp = SparkPost('fake-key')
+    with pytest.raises(SparkPostChunkedSendException) as exc:
+        sp.transmissions.send_chunked(
+            chunk_size=2,
+            recipients=['a@example.com', 'b@example.com', 'fail@example.com'])
+    assert exc.value.result['ids'] == ['a@example.com']
+    assert exc.value.result['total_accepted_recipients'] == 1
+    assert [index for index, _ in exc.value.errors] == [1]
+    assert isinstance(exc.value.errors[0][1], SparkPostAPIException)
+
+
+def test_body_builder():
+    t = Transmissions('uri', 'key')
+    build_body = t._body_builder({'content': {'text': 'hi'}}, 'recipients')
+    assert json.loads(build_body([1, 2])) == {'content': {'text': 'hi'},
+                                              'recipients': [1, 2]}
+    build_body = t._body_builder({}, 'recipients')
+    assert json.loads(build_body([])) == {'recipients': []}
+    build_body = t._body_builder({}, 'recipients', 'substitution_data')
+    assert json.loads(build_body([1], None)) == {'recipients': [1]}
+    assert json.loads(build_body([1], {'a': 1})) == {
+        'recipients': [1], 'substitution_data': {'a': 1}}
+
+
+@responses.activate
+def test_prepare():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345"}}'
+    )
+    sp = SparkPost('fake-key')
+    common = dict(from_email='Sender <from@example.com>', subject='hi',
+                  html='<p>{{name}}</p>', cc=['cc@example.com'],
+                  bcc=['bcc@example.com'], substitution_data={'name': 'x'},
+                  campaign='prepared', track_opens=True)
+    prototype = sp.transmissions.prepare(**common)
+
+    results = prototype.send(['a@example.com'])
+    assert results == {'id': '12345'}
+    expected = sp.transmissions._translate_keys(
+        recipients=['a@example.com'], **common)
+    assert json.loads(responses.calls[0].request.body) == expected
+
+    prototype.send([{'address': {'email': 'b@example.com'}}],
+                   substitution_data={'name': 'y'})
+    body = json.loads(responses.calls[1].request.body)
+    assert body['substitution_data'] == {'name': 'y'}
+    assert [r['address']['email'] for r in body['recipients']] == [
+        'b@example.com', 'cc@example.com', 'bcc@example.com']
+    assert body['recipients'][1]['address']['header_to'] == 'b@example.com'
+    assert body['content']['headers'] == {'CC': 'cc@example.com'}
+
+
+def test_prepare_with_recipients():
+    t = Transmissions('uri', 'key')
+    with pytest.raises(SparkPostException):
+        t.prepare(recipients=['a@example.com'])
+    with pytest.raises(SparkPostException):
+        t.prepare(text='hi', idempotency_key='key')
+
+
+def test_prepared_send_with_recipient_list():
+    prototype = Transmissions('uri', 'key').prepare(text='hi')
+    with pytest.raises(SparkPostException):
+        prototype.send({'list_id': 'my_list'})
+
+
+@responses.activate
+def test_send_with_idempotency_key():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345"}}'
+    )
+    sp = SparkPost('fake-key')
+    sp.transmissions.send(recipients=['a@example.com'], text='hi',
+                          metadata={'a': 1}, idempotency_key='key')
+    body = json.loads(responses.calls[0].request.body)
+    assert body['metadata'] == {'a': 1, 'idempotency_key': 'key'}
+
+    sp.transmissions.send(recipients=['a@example.com'], text='hi',
+                          idempotency_key=True)
+    sp.transmissions.send(recipients=['a@example.com'], text='hi',
+                          idempotency_key=True)
+    keys = [json.loads(call.request.body)['metadata']['idempotency_key']
+            for call in responses.calls[1:]]
+    assert len(keys) == 2
+    assert keys[0] == keys[1] != 'key'
+
+
+@responses.activate
+def test_send_with_idempotency_store():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=500
+    )
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345"}}'
+    )
+    sp = SparkPost('fake-key')
+    sp.transmissions.idempotency_store = IdempotencyStore()
+    kwargs = dict(recipients=['a@example.com'], text='hi')
+    with pytest.raises(SparkPostAPIException):
+        sp.transmissions.send(**kwargs)
+    assert sp.transmissions.send(**kwargs) == {'id': '12345'}
+    assert sp.transmissions.send(**kwargs) == {'id': '12345'}
+    assert len(responses.calls) == 2
+
+    sp.transmissions.send(idempotency_key=False, **kwargs)
+    assert len(responses.calls) == 3
+    assert 'metadata' not in json.loads(responses.calls[2].request.body)
+
+
+@responses.activate
+def test_send_chunked_with_idempotency_key():
+    responses.add_callback(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        callback=chunk_callback,
+        content_type='application/json'
+    )
+    sp = SparkPost('fake-key')
+    sp.transmissions.idempotency_store = IdempotencyStore()
+    kwargs = dict(chunk_size=2, concurrency=1, metadata={'a': 1}, text='hi',
+                  recipients=['a@example.com', 'b@example.com',
+                              'fail@example.com'],
+                  idempotency_key='key')
+    with pytest.raises(SparkPostChunkedSendException):
+        sp.transmissions.send_chunked(**kwargs)
+    bodies = [json.loads(call.request.body) for call in responses.calls]
+    assert [body['metadata'] for body in bodies] == [
+        {'a': 1, 'idempotency_key': 'key-0'},
+        {'a': 1, 'idempotency_key': 'key-1'}]
+    assert 'idempotency_key' not in bodies[0]
+
+    # The accepted chunk is not sent again
+    kwargs['recipients'][2] = 'c@example.com'
+    results = sp.transmissions.send_chunked(**kwargs)
+    assert len(responses.calls) == 3
+    assert results['ids'] == ['a@example.com', 'c@example.com']
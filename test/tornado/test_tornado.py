@@ -6,6 +6,7 @@ import tempfile
 import pytest
 import six
 
+from sparkpost.idempotency import IdempotencyStore
 from sparkpost.tornado import SparkPost, SparkPostAPIException
 from tornado import ioloop
 from .utils import AsyncClientMock
@@ -191,3 +192,86 @@ def test_success_list():
     sp = SparkPost('fake-key')
     response = ioloop.IOLoop().run_sync(sp.transmission.list)
     assert response == []
+
+
+@responses.activate
+def test_send_many():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345"}}'
+    )
+    sp = SparkPost('fake-key')
+    transmissions = [{'recipients': ['to%d@example.com' % i], 'text': 'hi'}
+                     for i in range(5)]
+
+    def send():
+        return sp.transmissions.send_many(transmissions, concurrency=2)
+    results = ioloop.IOLoop().run_sync(send, timeout=3)
+    assert [r.index for r in results] == list(range(5))
+    assert all(r.result == {'id': '12345'} for r in results)
+    assert all(r.error is None for r in results)
+    assert len(responses.calls) == 5
+    assert results.stats['sent'] == 5
+
+
+@responses.activate
+def test_send_many_failure():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=500,
+        content_type='application/json',
+        body='{"errors": [{"message": "failed"}]}'
+    )
+    sp = SparkPost('fake-key')
+
+    def send():
+        return sp.transmissions.send_many([{'text': 'hi'}])
+    results = ioloop.IOLoop().run_sync(send, timeout=3)
+    assert isinstance(results[0].error, SparkPostAPIException)
+
+
+@responses.activate
+def test_send_chunked():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345", "total_accepted_recipients": 2, '
+             '"total_rejected_recipients": 0}}'
+    )
+    sp = SparkPost('fake-key')
+    recipients = ['to%d@example.com' % i for i in range(5)]
+
+    def send():
+        return sp.transmissions.send_chunked(chunk_size=2,
+                                             recipients=recipients,
+                                             text='hi')
+    results = ioloop.IOLoop().run_sync(send, timeout=3)
+    assert len(responses.calls) == 3
+    assert results['ids'] == ['12345'] * 3
+    assert results['total_accepted_recipients'] == 6
+
+
+@responses.activate
+def test_idempotency_store():
+    responses.add(
+        responses.POST,
+        'https://api.sparkpost.com/api/v1/transmissions',
+        status=200,
+        content_type='application/json',
+        body='{"results": {"id": "12345"}}'
+    )
+    sp = SparkPost('fake-key')
+    sp.transmissions.idempotency_store = IdempotencyStore()
+
+    def send():
+        return sp.transmissions.send(recipients=['to@example.com'],
+                                     text='hi')
+    assert ioloop.IOLoop().run_sync(send) == {'id': '12345'}
+    assert ioloop.IOLoop().run_sync(send) == {'id': '12345'}
+    assert len(responses.calls) == 1